@@ -1,115 +1,946 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify
-import json
+# Debe ser el primer import: con GEVENT=1 parchea la biblioteca estándar
+import gevent_setup
+
+from flask import (
+    Flask,
+    render_template,
+    request,
+    redirect,
+    url_for,
+    jsonify,
+    make_response,
+    send_from_directory,
+    abort,
+    Response,
+)
+import functools
 import os
+import re
+import threading
+import time
 from datetime import datetime
 
+from jinja2 import FileSystemBytecodeCache
+
+from assets import IMMUTABLE_CACHE_CONTROL, AssetFingerprints
+from response_cache import (
+    ENCODINGS,
+    CompressedStream,
+    VersionedCache,
+    compress_response,
+)
+from serializers import dumps_record, loads_record
+from task_store import BULK_OPERATIONS, TaskStoreError, create_store
+
 app = Flask(__name__)
 
 # Archivo para persistir las tareas
 TASKS_FILE = "tasks.json"
 
+# Tareas por página en la página principal
+HOMEPAGE_PAGE_SIZE = 50
+
+# Tamaño de página de GET /api/tasks cuando se consulta con parámetros
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 1000
+
+# Límites created_after/created_before aceptados: fecha, hora opcional con
+# "T" o espacio, fracción de 3 o 6 dígitos y zona opcional
+CREATED_BOUND_FORMAT = re.compile(
+    r"\d{4}-\d{2}-\d{2}"
+    r"(?:[T ]\d{2}:\d{2}(?::\d{2}(?:\.\d{3}(?:\d{3})?)?)?)?"
+    r"(?:Z|[+-]\d{2}:\d{2})?"
+)
+
+# Máximo de tareas por petición a POST /api/tasks/batch y /api/tasks/bulk
+MAX_BATCH_SIZE = 1000
+
+# Representaciones de la lista completa de GET /api/tasks (la primera es la
+# predeterminada) y tareas serializadas por bloque al enviarla en streaming
+LIST_MIMETYPES = ("application/json", "application/x-ndjson")
+STREAM_CHUNK_SIZE = 500
+
+# Server-Sent Events de /api/tasks/events: suscriptores simultáneos por
+# proceso (con GEVENT=1 cada uno es una greenlet y no un hilo, así que el
+# límite es mucho mayor), espera entre comprobaciones de cambios, comentario
+# keepalive y duración máxima de cada conexión (el navegador reconecta con
+# Last-Event-ID)
+SSE_MAX_SUBSCRIBERS = int(
+    os.environ.get("SSE_MAX_SUBSCRIBERS", 10000 if gevent_setup.ENABLED else 100)
+)
+SSE_POLL_SECONDS = 1.0
+SSE_HEARTBEAT_SECONDS = 15
+SSE_MAX_STREAM_SECONDS = 300
+SSE_RETRY_MS = 2000
+
+# Procesos que sirven la app (ver __main__). Con más de uno, el feed de
+# cambios solo se ofrece si el repositorio comparte sus versiones entre
+# procesos (TASK_STORE=sqlite): con los demás cada worker tiene su propia
+# serie y cada consulta que cae en otro worker pediría resincronizar
+WORKERS = int(os.environ.get("WORKERS", 1))
+
+# Parámetros que activan la consulta paginada/filtrada de GET /api/tasks
+QUERY_ARGS = {
+    "limit",
+    "after_id",
+    "before_id",
+    "after",
+    "completed",
+    "created_after",
+    "created_before",
+    "sort",
+    "order",
+}
+
+# Repositorio en memoria compartido por todos los hilos de la app
+# (TASK_STORE=json|journal|sharded|sqlite selecciona el backend y
+# TASK_GROUP_COMMIT_MS > 0 agrupa las escrituras concurrentes)
+store = create_store(TASKS_FILE)
+
+# Cuerpos comprimidos de las respuestas condicionales, por ETag y URL
+compressed_responses = VersionedCache()
+
+# HTML ya renderizado de la página principal, por ETag y URL
+rendered_pages = VersionedCache(max_entries=64)
+
+# Huellas de los archivos de static/ para las URL de /assets/
+assets = AssetFingerprints(app.static_folder)
+
+# Huellas de las plantillas, para que el ETag de las páginas cambie al desplegar
+templates = AssetFingerprints(app.template_folder)
+
+# Conexiones abiertas a /api/tasks/events
+event_subscribers = threading.BoundedSemaphore(SSE_MAX_SUBSCRIBERS)
+
+# Bytecode de las plantillas compiladas, compartido por todos los procesos
+# que usen el mismo directorio (sin TEMPLATE_CACHE_DIR cada proceso compila)
+TEMPLATE_CACHE_DIR = os.environ.get("TEMPLATE_CACHE_DIR")
+if TEMPLATE_CACHE_DIR:
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+    app.jinja_env.bytecode_cache = FileSystemBytecodeCache(TEMPLATE_CACHE_DIR)
 
-def load_tasks():
-    """Carga las tareas desde el archivo JSON"""
-    if os.path.exists(TASKS_FILE):
+
+def invalidate_response_caches():
+    """
+    Descarta las respuestas cacheadas. Las entradas ya llevan el ETag en la
+    clave, pero vaciarlas al mutar libera la memoria de las versiones viejas
+    sin esperar al LRU y no depende de la resolución de la firma del
+    almacenamiento (dos escrituras del mismo tamaño en el mismo tick).
+    """
+    rendered_pages.clear()
+    compressed_responses.clear()
+
+
+def mutation(view):
+    """Marca una ruta que modifica tareas: invalida las cachés al terminar"""
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
         try:
-            with open(TASKS_FILE, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return []
-    return []
+            return view(*args, **kwargs)
+        finally:
+            invalidate_response_caches()
+
+    return wrapper
+
+
+def negotiate(mimetypes):
+    """El tipo de mimetypes preferido según Accept, o el primero si ninguno coincide"""
+    return request.accept_mimetypes.best_match(mimetypes) or mimetypes[0]
+
+
+def compress_and_cache(response, etag, encoding):
+    """
+    Comprime response y guarda el cuerpo en compressed_responses. Una
+    respuesta en streaming sigue en streaming: se guarda enseguida como
+    CompressedStream, así que las peticiones simultáneas de la misma versión
+    envían la misma compresión en lugar de comprimir cada una la lista.
+    """
+    key = request.full_path
+    if not response.is_streamed:
+        if compress_response(response, encoding):
+            body = response.get_data()
+            compressed_responses.put(
+                etag, key, (body, response.content_type), len(body)
+            )
+        return
+
+    def finished(size):
+        if size is None:
+            compressed_responses.discard(etag, key)
+        else:
+            compressed_responses.resize(etag, key, size)
+
+    stream = CompressedStream(response.iter_encoded(), encoding, finished)
+    body, _ = compressed_responses.setdefault(
+        etag, key, (stream, response.content_type), 0
+    )
+    response.response = body
+    response.content_encoding = encoding
+
+
+def page_build_id():
+    """
+    Huella de lo que, además de los datos, define el HTML de las páginas:
+    las plantillas y los archivos de static/, cuyas URL llevan su huella.
+    Cambia con un despliegue aunque las tareas no cambien.
+    """
+    return templates.build_id() + assets.build_id()
+
+
+def conditional(view=None, vary=None, compress=False, build=None):
+    """
+    Responde 304 sin cargar ni serializar tareas cuando If-None-Match coincide
+    con el ETag actual del repositorio. El ETag se calcula antes de generar
+    la respuesta: si los datos cambian mientras tanto, la respuesta queda
+    etiquetada con una versión anterior y el cliente solo la vuelve a pedir.
+
+    vary es la tupla de tipos que la vista negocia con Accept; cada
+    representación recibe su propio ETag.
 
+    build es una función que devuelve la huella de lo que, además de los
+    datos, determina la respuesta (ver page_build_id); se agrega al ETag.
 
-def save_tasks(tasks):
-    """Guarda las tareas en el archivo JSON"""
-    with open(TASKS_FILE, "w", encoding="utf-8") as f:
-        json.dump(tasks, f, ensure_ascii=False, indent=2)
+    Con compress=True el cuerpo se comprime con la codificación que acepte
+    el cliente (Accept-Encoding) y se guarda en compressed_responses con el
+    ETag como versión: mientras los datos no cambian, las peticiones
+    siguientes no vuelven a generar ni a comprimir la respuesta.
+    """
+    if view is None:
+        return functools.partial(conditional, vary=vary, compress=compress, build=build)
+
+    @functools.wraps(view)
+    def wrapper(*args, **kwargs):
+        etag = store.etag()
+        if build is not None:
+            etag = f"{etag}-{build()}"
+        mimetype = negotiate(vary) if vary else None
+        if mimetype and mimetype != vary[0]:
+            etag = f"{etag}-{mimetype.rsplit('/', 1)[-1]}"
+        encoding = request.accept_encodings.best_match(ENCODINGS) if compress else None
+        if encoding:
+            etag = f"{etag}-{encoding}"
+
+        if request.if_none_match.contains(etag):
+            response = Response(status=304)
+        else:
+            cached = None
+            if encoding:
+                cached = compressed_responses.get(etag, request.full_path)
+            if cached is not None:
+                body, content_type = cached
+                response = Response(body, content_type=content_type)
+                response.content_encoding = encoding
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+                if encoding:
+                    compress_and_cache(response, etag, encoding)
+        response.set_etag(etag)
+        # El cliente puede guardar la respuesta pero debe revalidarla siempre
+        response.headers["Cache-Control"] = "no-cache"
+        if vary:
+            response.vary.add("Accept")
+        if compress:
+            response.vary.add("Accept-Encoding")
+        return response
+
+    return wrapper
 
 
 @app.route("/")
+@conditional(compress=True, build=page_build_id)
 def index():
-    """Página principal con la lista de tareas"""
-    tasks = load_tasks()
-    return render_template("index.html", tasks=tasks)
+    """
+    Página principal: una ventana de HOMEPAGE_PAGE_SIZE tareas, navegable
+    con los cursores after_id y before_id, y los totales de la lista
+    completa. El costo del render no depende de la cantidad de tareas. El
+    HTML se guarda en rendered_pages hasta la próxima mutación o despliegue.
+    """
+    etag = f"{store.etag()}-{page_build_id()}"
+    html = rendered_pages.get(etag, request.full_path)
+    if html is None:
+        html = render_index(
+            request.args.get("after_id", type=int),
+            request.args.get("before_id", type=int),
+        )
+        rendered_pages.put(etag, request.full_path, html, len(html))
+    return html
+
+
+def render_index(after_id=None, before_id=None):
+    """Renderiza la página de tareas posterior a after_id o anterior a before_id"""
+    tasks, has_more = store.page(HOMEPAGE_PAGE_SIZE, after_id, before_id)
+    first = tasks[0]["id"] if tasks else None
+    last = tasks[-1]["id"] if tasks else None
+    if before_id is not None:
+        next_cursor, prev_cursor = last, first if has_more else None
+    else:
+        next_cursor = last if has_more else None
+        prev_cursor = first if after_id is not None else None
+    counts = store.counts()
+    return render_template(
+        "index.html",
+        tasks=tasks,
+        total=counts["total"],
+        completed_count=counts["completed"],
+        next_cursor=next_cursor,
+        prev_cursor=prev_cursor,
+    )
+
+
+@app.template_global()
+def asset_url(filename):
+    """URL con huella de un archivo de static/, cacheable para siempre"""
+    return url_for(
+        "static_asset", fingerprint=assets.fingerprint(filename), filename=filename
+    )
+
+
+@app.route("/assets/<fingerprint>/<path:filename>")
+def static_asset(fingerprint, filename):
+    """
+    Sirve un archivo de static/ con Cache-Control immutable. Una huella que
+    ya no corresponde al archivo (HTML viejo tras un despliegue) redirige a
+    la URL actual, sin caché de larga duración.
+    """
+    try:
+        current = assets.fingerprint(filename)
+    except FileNotFoundError:
+        abort(404)
+    if fingerprint != current:
+        return redirect(asset_url(filename))
+    response = send_from_directory(app.static_folder, filename)
+    response.headers["Cache-Control"] = IMMUTABLE_CACHE_CONTROL
+    return response
+
+
+def wants_json():
+    """
+    True si el cliente pide JSON (Accept: application/json) en lugar de HTML:
+    las rutas de formulario responden entonces sin redirigir a la página
+    """
+    preferred = request.accept_mimetypes.best_match(("text/html", "application/json"))
+    return preferred == "application/json"
+
+
+def bulk_response(op, task_id):
+    """
+    Aplica op a una tarea y arma la respuesta JSON: la tarea actualizada,
+    204 si se borró o 404 si no existe
+    """
+    result = store.bulk(op, [task_id])[0]
+    if result["status"] == "not_found":
+        return jsonify({"error": "Task not found"}), 404
+    if result["status"] == "deleted":
+        return "", 204
+    return jsonify(result["task"])
 
 
 @app.route("/add", methods=["POST"])
+@mutation
 def add_task():
     """Agregar nueva tarea"""
     task_text = request.form.get("task", "").strip()
+    new_task = None
     if task_text:
-        tasks = load_tasks()
-        new_task = {
-            "id": len(tasks) + 1,
-            "text": task_text,
-            "completed": False,
-            "created_at": datetime.now().isoformat(),
-        }
-        tasks.append(new_task)
-        save_tasks(tasks)
+        new_task = store.add(
+            {
+                "text": task_text,
+                "completed": False,
+                "created_at": datetime.now().isoformat(),
+            }
+        )
+    if wants_json():
+        if new_task is None:
+            return jsonify({"error": "Text is required"}), 400
+        return jsonify(new_task), 201
     return redirect(url_for("index"))
 
 
 @app.route("/toggle/<int:task_id>")
+@mutation
 def toggle_task(task_id):
     """Cambiar estado de completado de una tarea"""
-    tasks = load_tasks()
-    for task in tasks:
-        if task["id"] == task_id:
-            task["completed"] = not task["completed"]
-            break
-    save_tasks(tasks)
+    if wants_json():
+        return bulk_response("toggle", task_id)
+    store.toggle(task_id)
     return redirect(url_for("index"))
 
 
 @app.route("/delete/<int:task_id>")
+@mutation
 def delete_task(task_id):
     """Eliminar una tarea"""
-    tasks = load_tasks()
-    tasks = [task for task in tasks if task["id"] != task_id]
-    save_tasks(tasks)
+    if wants_json():
+        return bulk_response("delete", task_id)
+    store.delete(task_id)
     return redirect(url_for("index"))
 
 
+def normalize_created_bound(value):
+    """
+    Convierte un límite de fecha al formato con que se guarda created_at
+    (isoformat() en hora local, sin zona) para poder compararlos como texto.
+    Solo acepta CREATED_BOUND_FORMAT, que fromisoformat() entiende igual en
+    todas las versiones de Python; las fechas con zona se pasan a la hora
+    local. Lanza ValueError para el resto.
+    """
+    if not CREATED_BOUND_FORMAT.fullmatch(value):
+        raise ValueError(value)
+    if value.endswith("Z"):
+        value = value[:-1] + "+00:00"
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment.isoformat()
+
+
+def parse_query_args(args):
+    """
+    Lee los parámetros de consulta de GET /api/tasks y devuelve los
+    argumentos para store.query(); lanza ValueError si no son válidos
+    """
+    values = {}
+    for name in ("limit", "after_id", "before_id"):
+        raw = args.get(name)
+        try:
+            values[name] = int(raw) if raw is not None else None
+        except ValueError:
+            raise ValueError(f"{name} must be an integer") from None
+
+    limit = values["limit"] if values["limit"] is not None else DEFAULT_PAGE_SIZE
+    if not 1 <= limit <= MAX_PAGE_SIZE:
+        raise ValueError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+
+    completed = args.get("completed")
+    if completed is not None:
+        if completed.lower() not in ("true", "false", "1", "0"):
+            raise ValueError("completed must be true or false")
+        completed = completed.lower() in ("true", "1")
+
+    bounds = {}
+    for name in ("created_after", "created_before"):
+        bounds[name] = args.get(name)
+        if bounds[name] is not None:
+            try:
+                bounds[name] = normalize_created_bound(bounds[name])
+            except ValueError:
+                raise ValueError(
+                    f"{name} must be an ISO 8601 date (YYYY-MM-DD[THH:MM[:SS]])"
+                ) from None
+
+    after_key = None
+    if args.get("after") is not None:
+        created_at, _, task_id = args["after"].rpartition(",")
+        if not created_at or not task_id.isdigit():
+            raise ValueError("after must be a next_cursor from sort=created_at")
+        after_key = (created_at, int(task_id))
+
+    sort = args.get("sort", "id")
+    if sort not in ("id", "created_at"):
+        raise ValueError("sort must be id or created_at")
+    order = args.get("order", "asc")
+    if order not in ("asc", "desc"):
+        raise ValueError("order must be asc or desc")
+
+    if values["after_id"] is not None and values["before_id"] is not None:
+        raise ValueError("after_id and before_id are mutually exclusive")
+    if sort != "id" and (
+        values["after_id"] is not None or values["before_id"] is not None
+    ):
+        raise ValueError("after_id and before_id require sort=id")
+    if values["before_id"] is not None and order == "desc":
+        raise ValueError("before_id cannot be combined with order=desc")
+    if after_key is not None and sort != "created_at":
+        raise ValueError("after requires sort=created_at")
+
+    return {
+        "limit": limit,
+        "after_id": values["after_id"],
+        "before_id": values["before_id"],
+        "completed": completed,
+        "created_after": bounds["created_after"],
+        "created_before": bounds["created_before"],
+        "sort": sort,
+        "descending": order == "desc",
+        "after_key": after_key,
+    }
+
+
+def stream_tasks(tasks, mimetype):
+    """
+    Cuerpo de la lista completa generado por bloques de STREAM_CHUNK_SIZE
+    tareas: un array JSON o NDJSON (una tarea por línea). Nunca se arma el
+    cuerpo completo en memoria y el primer byte sale sin esperar al resto.
+    """
+    ndjson = mimetype == "application/x-ndjson"
+    if not ndjson:
+        yield "["
+    for start in range(0, len(tasks), STREAM_CHUNK_SIZE):
+        chunk = tasks[start : start + STREAM_CHUNK_SIZE]
+        if ndjson:
+            yield "".join(dumps_record(task) + "\n" for task in chunk)
+        else:
+            # El array del bloque sin sus corchetes
+            body = dumps_record(chunk)[1:-1]
+            yield body if start == 0 else "," + body
+    if not ndjson:
+        yield "]\n"
+
+
 @app.route("/api/tasks", methods=["GET"])
+@conditional(vary=LIST_MIMETYPES, compress=True)
 def api_get_tasks():
-    """API endpoint para obtener todas las tareas"""
-    tasks = load_tasks()
-    return jsonify(tasks)
+    """
+    API endpoint para obtener las tareas. Sin parámetros devuelve la lista
+    completa en streaming, como array JSON o como NDJSON si Accept pide
+    application/x-ndjson. Con parámetros devuelve una página filtrada y
+    ordenada:
+        limit                          tamaño de página (default 50)
+        after_id / before_id           cursores para sort=id
+        after                          cursor para sort=created_at
+        completed                      true o false
+        created_after / created_before límites exclusivos (ISO 8601)
+        sort, order                    id o created_at; asc o desc
+    next_cursor es el after_id de la página siguiente; con sort=created_at
+    es "created_at,id" de la última tarea, para usar en after (la fecha
+    sola no alcanza: un lote comparte created_at).
+    prev_cursor es el before_id de la página anterior, solo en páginas
+    ascendentes por id.
+    """
+    if not QUERY_ARGS & set(request.args):
+        # La lista se obtiene antes de responder para que un error de lectura
+        # siga siendo un 500; solo se genera por partes la serialización
+        mimetype = negotiate(LIST_MIMETYPES)
+        return Response(stream_tasks(store.all(), mimetype), mimetype=mimetype)
+
+    try:
+        options = parse_query_args(request.args)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    before_id = options.pop("before_id")
+    if before_id is not None:
+        options.update(after_id=before_id, descending=True)
+    tasks, has_more = store.query(**options)
+    if before_id is not None:
+        tasks.reverse()
+
+    first = tasks[0]["id"] if tasks else None
+    last = tasks[-1] if tasks else None
+    if before_id is not None:
+        next_cursor = last["id"] if last else None
+        prev_cursor = first if has_more else None
+    else:
+        next_cursor = None
+        if has_more:
+            next_cursor = (
+                f"{last['created_at']},{last['id']}"
+                if options["sort"] == "created_at"
+                else last["id"]
+            )
+        # before_id solo recorre el orden ascendente: una página descendente
+        # no tiene cursor anterior
+        prev_cursor = None
+        if options["after_id"] is not None and not options["descending"]:
+            prev_cursor = first
+    return jsonify(
+        {"tasks": tasks, "next_cursor": next_cursor, "prev_cursor": prev_cursor}
+    )
 
 
 @app.route("/api/tasks", methods=["POST"])
+@mutation
 def api_add_task():
     """API endpoint para agregar una tarea"""
     data = request.get_json()
     if not data or "text" not in data:
         return jsonify({"error": "Text is required"}), 400
 
-    tasks = load_tasks()
-    new_task = {
-        "id": len(tasks) + 1,
-        "text": data["text"],
-        "completed": False,
-        "created_at": datetime.now().isoformat(),
-    }
-    tasks.append(new_task)
-    save_tasks(tasks)
+    new_task = store.add(
+        {
+            "text": data["text"],
+            "completed": False,
+            "created_at": datetime.now().isoformat(),
+        }
+    )
     return jsonify(new_task), 201
 
 
+@app.route("/api/tasks/<int:task_id>", methods=["PATCH"])
+@mutation
+def api_update_task(task_id):
+    """
+    API endpoint para marcar o desmarcar una tarea: {"completed": true}.
+    Devuelve la tarea actualizada, sin redirección.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get("completed"), bool):
+        return jsonify({"error": "completed must be a boolean"}), 400
+    if set(data) != {"completed"}:
+        return jsonify({"error": "Only completed can be updated"}), 400
+    return bulk_response("complete" if data["completed"] else "uncomplete", task_id)
+
+
+@app.route("/api/tasks/<int:task_id>", methods=["DELETE"])
+@mutation
+def api_delete_task(task_id):
+    """API endpoint para eliminar una tarea: 204 sin cuerpo, o 404"""
+    return bulk_response("delete", task_id)
+
+
+def parse_batch(req):
+    """
+    Textos de las tareas de un lote: un array JSON de textos o de objetos
+    {"text": ...}, o NDJSON con un texto u objeto por línea. Lanza ValueError
+    si el cuerpo no es válido.
+    """
+    if req.mimetype == "application/x-ndjson":
+        lines = req.get_data(as_text=True).splitlines()
+        try:
+            items = [loads_record(line) for line in lines if line.strip()]
+        except ValueError:
+            raise ValueError("Invalid NDJSON line") from None
+    else:
+        items = req.get_json(silent=True)
+        if not isinstance(items, list):
+            raise ValueError("Body must be a JSON array or NDJSON")
+
+    texts = []
+    for item in items:
+        text = item.get("text") if isinstance(item, dict) else item
+        if not isinstance(text, str) or not text.strip():
+            raise ValueError("Every task needs a non-empty text")
+        texts.append(text.strip())
+    if not texts:
+        raise ValueError("At least one task is required")
+    if len(texts) > MAX_BATCH_SIZE:
+        raise ValueError(f"At most {MAX_BATCH_SIZE} tasks per batch")
+    return texts
+
+
+@app.route("/api/tasks/batch", methods=["POST"])
+@mutation
+def api_add_tasks_batch():
+    """API endpoint para agregar varias tareas en una sola escritura"""
+    try:
+        texts = parse_batch(request)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    created_at = datetime.now().isoformat()
+    new_tasks = store.add_many(
+        [{"text": text, "completed": False, "created_at": created_at} for text in texts]
+    )
+    return jsonify(new_tasks), 201
+
+
+@app.route("/api/tasks/bulk", methods=["POST"])
+@mutation
+def api_bulk_tasks():
+    """
+    API endpoint para completar, desmarcar, alternar o eliminar varias tareas
+    en una sola escritura: {"op": "complete", "ids": [1, 2, 3]}
+    """
+    data = request.get_json(silent=True) or {}
+    op = data.get("op")
+    ids = data.get("ids")
+    if op not in BULK_OPERATIONS:
+        return (
+            jsonify({"error": f"op must be one of {', '.join(BULK_OPERATIONS)}"}),
+            400,
+        )
+    if not isinstance(ids, list) or not all(
+        isinstance(task_id, int) and not isinstance(task_id, bool) for task_id in ids
+    ):
+        return jsonify({"error": "ids must be a list of integers"}), 400
+    if len(ids) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} ids per request"}), 400
+
+    return jsonify({"op": op, "results": store.bulk(op, ids)})
+
+
+@app.route("/api/tasks/count")
+@conditional
+def api_count_tasks():
+    """API endpoint con la cantidad de tareas (sin cargar la lista completa)"""
+    return jsonify({"count": store.count()})
+
+
+@app.route("/api/tasks/stats")
+@conditional
+def api_task_stats():
+    """
+    API endpoint con los totales para resúmenes y tableros: salen de los
+    contadores del repositorio, sin recorrer ni serializar las tareas
+    """
+    counts = store.counts()
+    return jsonify(
+        {
+            "total": counts["total"],
+            "completed": counts["completed"],
+            "pending": counts["total"] - counts["completed"],
+        }
+    )
+
+
+def version_token(version):
+    """Token público de una versión: epoch del proceso y número de versión"""
+    return f"{store.epoch()}-{version}"
+
+
+def parse_version_token(token):
+    """
+    Versión de un token de version_token(), o None si es de otro proceso o
+    de antes de un reinicio; lanza ValueError si no es un token válido
+    """
+    epoch, _, version = token.rpartition("-")
+    if not epoch or not version.isdigit():
+        raise ValueError("not a version token")
+    return int(version) if epoch == store.epoch() else None
+
+
+def change_feed_unavailable():
+    """Respuesta 501 si este despliegue no puede ofrecer el feed de cambios, o None"""
+    if WORKERS == 1 or store.shared_changes:
+        return None
+    response = jsonify(
+        {
+            "error": (
+                f"The change feed is per process and the app runs {WORKERS} "
+                "workers; use TASK_STORE=sqlite or poll GET /api/tasks with "
+                "If-None-Match"
+            )
+        }
+    )
+    response.status_code = 501
+    return response
+
+
+def changes_body(version, changes):
+    """Cuerpo de /api/tasks/changes y datos de los eventos de /api/tasks/events"""
+    body = {"version": version_token(version), "resync": changes is None}
+    if changes is not None:
+        body["changes"] = changes
+    return body
+
+
+@app.route("/api/tasks/changes")
+def api_task_changes():
+    """
+    Cambios desde la versión since (el campo version de una respuesta
+    anterior): {"version", "resync": false, "changes": [{"id", "task"}]},
+    donde task es null si la tarea se borró. Si since es demasiado antigua,
+    de otro proceso, o falta, responde {"version", "resync": true}: el
+    cliente debe leer GET /api/tasks completo y seguir desde esa version.
+    Con WORKERS > 1 solo existe si el repositorio es SQLite; si no, responde
+    501 (ver change_feed_unavailable).
+    """
+    unavailable = change_feed_unavailable()
+    if unavailable is not None:
+        return unavailable
+    since = None
+    if "since" in request.args:
+        try:
+            since = parse_version_token(request.args["since"])
+        except ValueError:
+            return jsonify({"error": "since must be a version token"}), 400
+    if since is None:
+        return jsonify(changes_body(store.version(), None))
+    return jsonify(changes_body(*store.changes(since)))
+
+
+def sse_event(event, version, changes):
+    """Un evento SSE con la versión como id para reanudar con Last-Event-ID"""
+    data = dumps_record(changes_body(version, changes))
+    return f"id: {version_token(version)}\nevent: {event}\ndata: {data}\n\n"
+
+
+def task_events(since, deadline):
+    """
+    Eventos de /api/tasks/events a partir de la versión since (None empieza
+    con un resync). Entre cambios la espera es sobre la condición del
+    repositorio, sin consultas activas; cada SSE_HEARTBEAT_SECONDS se envía
+    un comentario para detectar clientes desconectados.
+    """
+    yield f"retry: {SSE_RETRY_MS}\n\n"
+    version = since
+    if version is None:
+        version = store.version()
+        yield sse_event("resync", version, None)
+    last_sent = time.monotonic()
+    while time.monotonic() < deadline:
+        current, changes = store.changes(version)
+        if changes:
+            yield sse_event("changes", current, changes)
+        elif changes is None and current != version:
+            yield sse_event("resync", current, None)
+        elif time.monotonic() - last_sent >= SSE_HEARTBEAT_SECONDS:
+            yield ": keepalive\n\n"
+        else:
+            store.wait_for_version(version, SSE_POLL_SECONDS)
+            continue
+        version, last_sent = current, time.monotonic()
+
+
+@app.route("/api/tasks/events")
+def api_task_events():
+    """
+    Stream Server-Sent Events de las mutaciones. Cada evento "changes" trae
+    los mismos datos que /api/tasks/changes y un evento "resync" pide volver
+    a leer la lista completa. El id de cada evento es un token de versión:
+    al reconectar, Last-Event-ID (o ?last_event_id=) reanuda desde ahí.
+
+    Los suscriptores se limitan a SSE_MAX_SUBSCRIBERS por proceso (503 si no
+    hay lugar) y cada conexión dura como máximo SSE_MAX_STREAM_SECONDS. Con
+    el servidor de desarrollo cada conexión ocupa un hilo; para miles de
+    suscriptores inactivos la app se sirve con GEVENT=1, donde cada conexión
+    es una greenlet. Como /api/tasks/changes, con WORKERS > 1 responde 501
+    salvo con el repositorio SQLite.
+
+    Limitación de GEVENT=1: el parcheo no alcanza la E/S de los
+    repositorios. fcntl.flock, os.fsync y las llamadas de sqlite3 bloquean
+    el hub, así que mientras una escritura espera el lock de otro proceso o
+    el disco, ningún suscriptor del mismo worker avanza. Con escrituras
+    frecuentes conviene repartir los suscriptores en varios workers, lo que
+    requiere TASK_STORE=sqlite.
+    """
+    unavailable = change_feed_unavailable()
+    if unavailable is not None:
+        return unavailable
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get(
+        "last_event_id"
+    )
+    since = None
+    if last_event_id:
+        try:
+            since = parse_version_token(last_event_id)
+        except ValueError:
+            return jsonify({"error": "Last-Event-ID must be a version token"}), 400
+
+    if not event_subscribers.acquire(blocking=False):
+        response = jsonify({"error": "Too many event subscribers"})
+        response.status_code = 503
+        response.headers["Retry-After"] = str(SSE_RETRY_MS // 1000)
+        return response
+
+    deadline = time.monotonic() + SSE_MAX_STREAM_SECONDS
+    response = Response(task_events(since, deadline), mimetype="text/event-stream")
+    # Se libera el lugar también si el cliente corta antes del primer evento
+    response.call_on_close(event_subscribers.release)
+    response.headers["Cache-Control"] = "no-cache"
+    response.headers["X-Accel-Buffering"] = "no"
+    return response
+
+
+@app.route("/api/tasks/export")
+def api_export_tasks():
+    """Exporta las tareas como NDJSON, una por línea, en streaming"""
+    lines = (dumps_record(task) + "\n" for task in store.iter_tasks())
+    return Response(
+        lines,
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=tasks.ndjson"},
+    )
+
+
+@app.route("/api/cache/stats")
+def api_cache_stats():
+    """Aciertos y fallos de las cachés de tareas, de respuestas y de páginas"""
+    stats = store.stats()
+    stats["compressed_responses"] = compressed_responses.stats()
+    stats["rendered_pages"] = rendered_pages.stats()
+    return jsonify(stats)
+
+
+@app.errorhandler(TaskStoreError)
+def handle_store_error(error):
+    """Error de lectura del almacenamiento: no se sirven datos incompletos"""
+    return jsonify({"error": str(error)}), 500
+
+
 @app.route("/health")
 def health_check():
     """Health check endpoint"""
     return jsonify({"status": "healthy", "timestamp": datetime.now().isoformat()})
 
 
+def warm_up():
+    """
+    Compila las plantillas y calcula las huellas de las plantillas y de
+    static/ antes de la primera petición; devuelve la cantidad de plantillas
+    compiladas
+    """
+    names = app.jinja_env.list_templates()
+    for name in names:
+        app.jinja_env.get_template(name)
+    page_build_id()
+    return len(names)
+
+
+# TEMPLATE_WARMUP=1 adelanta al arranque el trabajo de la primera petición,
+# también cuando el módulo lo importa otro servidor WSGI
+if os.environ.get("TEMPLATE_WARMUP") == "1":
+    warm_up()
+
+
+def run_gunicorn(host, port, workers, threads):
+    """
+    Sirve la app con gunicorn: workers procesos persistentes (prefork), cada
+    uno con threads hilos, o con greenlets si GEVENT=1. Cada worker importa
+    el módulo app después del fork, así que tiene su propio repositorio,
+    cachés y bloque de ids.
+    """
+    import importlib
+
+    try:
+        from gunicorn.app.base import BaseApplication
+    except ImportError:
+        raise SystemExit("WORKERS > 1 requiere gunicorn: pip install gunicorn")
+
+    class TaskListApplication(BaseApplication):
+        def load_config(self):
+            self.cfg.set("bind", f"{host}:{port}")
+            self.cfg.set("workers", workers)
+            if gevent_setup.ENABLED:
+                self.cfg.set("worker_class", "gevent")
+                # Suscriptores SSE más margen para las demás peticiones
+                self.cfg.set("worker_connections", SSE_MAX_SUBSCRIBERS + 1000)
+            else:
+                self.cfg.set("worker_class", "gthread")
+                self.cfg.set("threads", threads)
+
+        def load(self):
+            return importlib.import_module("app").app
+
+    TaskListApplication().run()
+
+
 if __name__ == "__main__":
     # Configurar puerto y host desde variables de entorno
     port = int(os.environ.get("PORT", 5000))
     host = os.environ.get("HOST", "0.0.0.0")
     debug = os.environ.get("FLASK_ENV") == "development"
+    # WORKERS > 1 arranca gunicorn con esa cantidad de procesos persistentes
+    # (equivale a gunicorn -w WORKERS -k gthread --threads THREADS app:app, o
+    # -k gevent con GEVENT=1); con un solo proceso, GEVENT=1 usa el servidor
+    # WSGI de gevent en lugar del de desarrollo
+    workers = WORKERS
+    threads = int(os.environ.get("THREADS", 4))
 
     print(f"[FLASK] Iniciando Flask en {host}:{port}")
     print(f"[FLASK] Modo debug: {debug}")
+    print(f"[FLASK] Workers: {workers}")
+    print(f"[FLASK] gevent: {gevent_setup.ENABLED}")
+    print(f"[FLASK] Warm-up de plantillas: {os.environ.get('TEMPLATE_WARMUP') == '1'}")
+
+    if workers > 1:
+        run_gunicorn(host, port, workers, threads)
+    elif gevent_setup.ENABLED:
+        from gevent.pywsgi import WSGIServer
 
-    app.run(debug=debug, host=host, port=port)
+        WSGIServer((host, port), app).serve_forever()
+    else:
+        app.run(debug=debug, host=host, port=port, threaded=True)
@@ -0,0 +1,65 @@
+"""
+Recursos estáticos con la huella de su contenido en la URL
+
+asset_url("css/style.css") en las plantillas produce
+/assets/<huella>/css/style.css. Como la URL cambia cuando cambia el archivo,
+el navegador puede guardarla sin revalidar (Cache-Control: immutable) y las
+visitas siguientes solo piden el documento HTML.
+"""
+
+import hashlib
+import os
+import threading
+
+from werkzeug.security import safe_join
+
+# Un año, el máximo que respetan los navegadores
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+
+class AssetFingerprints:
+    """
+    Huellas de los archivos de directory. Se calculan una vez por archivo y
+    se recalculan solo si cambia su fecha de modificación o su tamaño.
+    """
+
+    def __init__(self, directory, length=12):
+        self.directory = directory
+        self.length = length
+        self._lock = threading.Lock()
+        self._fingerprints = {}
+
+    def fingerprint(self, filename):
+        """Huella de filename; lanza FileNotFoundError si no existe"""
+        path = safe_join(self.directory, filename)
+        if path is None or not os.path.isfile(path):
+            raise FileNotFoundError(filename)
+        stat = os.stat(path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._fingerprints.get(filename)
+            if cached is not None and cached[0] == signature:
+                return cached[1]
+        with open(path, "rb") as f:
+            digest = hashlib.blake2b(f.read(), digest_size=16).hexdigest()
+        fingerprint = digest[: self.length]
+        with self._lock:
+            self._fingerprints[filename] = (signature, fingerprint)
+        return fingerprint
+
+    def files(self):
+        """Rutas de todos los archivos de directory, relativas y con /"""
+        for root, _, filenames in os.walk(self.directory):
+            for filename in filenames:
+                path = os.path.relpath(os.path.join(root, filename), self.directory)
+                yield path.replace(os.sep, "/")
+
+    def build_id(self):
+        """
+        Huella del directorio completo: cambia si se agrega, quita o modifica
+        cualquiera de sus archivos
+        """
+        digest = hashlib.blake2b(digest_size=4)
+        for filename in sorted(self.files()):
+            digest.update(f"{filename}:{self.fingerprint(filename)}\n".encode())
+        return digest.hexdigest()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Script para convertir el archivo de tareas entre formatos de serialización
+El formato de origen se detecta automáticamente (json, pretty o msgpack)
+"""
+
+import argparse
+import os
+import sys
+
+from serializers import convert_file
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Convierte tasks.json entre formatos de serialización",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python convert_tasks.py --to msgpack                      # convierte tasks.json en el lugar
+  python convert_tasks.py tasks.json --to pretty --output tasks-legible.json
+        """,
+    )
+    parser.add_argument(
+        "source",
+        nargs="?",
+        default="tasks.json",
+        help="Archivo de origen (default: tasks.json)",
+    )
+    parser.add_argument(
+        "--to",
+        required=True,
+        choices=["json", "pretty", "msgpack"],
+        help="Formato de destino",
+    )
+    parser.add_argument(
+        "--output", help="Archivo de destino (default: reemplaza el de origen)"
+    )
+    args = parser.parse_args()
+
+    if not os.path.exists(args.source):
+        print(f"❌ No existe {args.source}")
+        return 1
+
+    target = args.output or args.source
+    before = os.path.getsize(args.source)
+    count, name = convert_file(args.source, target, args.to)
+    after = os.path.getsize(target)
+    print(f"✅ {count} tareas escritas en {target} ({name})")
+    print(f"   Tamaño: {before} → {after} bytes")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,22 @@
+"""
+Modo gevent opcional (GEVENT=1)
+
+Cada conexión se atiende en una greenlet en lugar de un hilo, así que miles
+de suscriptores inactivos de /api/tasks/events no ocupan un hilo cada uno:
+la espera sobre la condición del repositorio cede el control al resto.
+app.py importa este módulo antes que cualquier otro porque el parcheo de la
+biblioteca estándar (threading, socket, time) tiene que ocurrir antes de
+que otros módulos la importen.
+"""
+
+import os
+
+ENABLED = os.environ.get("GEVENT") == "1"
+
+if ENABLED:
+    try:
+        from gevent import monkey
+    except ImportError:
+        raise SystemExit("GEVENT=1 requiere gevent: pip install gevent")
+
+    monkey.patch_all()
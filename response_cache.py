@@ -0,0 +1,238 @@
+"""
+Compresión de respuestas y caché de cuerpos por versión de los datos
+
+gzip siempre está disponible; br (brotli) solo si está instalado el paquete
+brotli. Los cuerpos comprimidos se guardan en una VersionedCache con la
+versión de los datos como parte de la clave, así que se comprimen una vez
+por mutación y no una vez por petición. Las respuestas en streaming se
+comprimen con un CompressedStream, que sigue en streaming y se comparte
+entre las peticiones simultáneas de la misma versión.
+"""
+
+import collections
+import threading
+import zlib
+
+try:
+    import brotli
+except ImportError:  # Solo se ofrece gzip
+    brotli = None
+
+# Codificaciones aceptadas, por orden de preferencia del servidor
+ENCODINGS = ("br", "gzip") if brotli is not None else ("gzip",)
+
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Por debajo de este tamaño la compresión no compensa su costo
+MIN_COMPRESS_SIZE = 512
+
+
+def compress_chunks(chunks, encoding):
+    """Comprime un iterable de bloques de bytes en el cuerpo completo"""
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        parts = [compressor.process(chunk) for chunk in chunks]
+        parts.append(compressor.finish())
+    elif encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        parts = [compressor.compress(chunk) for chunk in chunks]
+        parts.append(compressor.flush())
+    else:
+        raise ValueError(f"Codificación desconocida: {encoding}")
+    return b"".join(parts)
+
+
+def compress_response(response, encoding):
+    """
+    Comprime en el lugar el cuerpo de una respuesta que ya está en memoria
+    (las respuestas en streaming usan CompressedStream). Devuelve False si
+    es demasiado chica para comprimirla.
+    """
+    if response.content_length < MIN_COMPRESS_SIZE:
+        return False
+    response.set_data(compress_chunks(response.iter_encoded(), encoding))
+    response.content_encoding = encoding
+    return True
+
+
+def _block_compressor(encoding):
+    """
+    Funciones (comprimir un bloque, terminar) de un compresor que vacía su
+    salida después de cada bloque, para que cada bloque llegue enseguida al
+    cliente en lugar de quedar retenido en el buffer del compresor
+    """
+    if encoding == "br":
+        compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+
+        def compress(chunk):
+            return compressor.process(chunk) + compressor.flush()
+
+        return compress, compressor.finish
+    if encoding == "gzip":
+        compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+        def compress(chunk):
+            return compressor.compress(chunk) + compressor.flush(zlib.Z_SYNC_FLUSH)
+
+        return compress, compressor.flush
+    raise ValueError(f"Codificación desconocida: {encoding}")
+
+
+class CompressedStream:
+    """
+    Cuerpo comprimido que se genera a medida que se lee. Cada iteración es
+    un lector independiente: el que necesita el próximo bloque lo lee de
+    chunks y lo comprime, y los demás reutilizan los bloques ya comprimidos,
+    así que hay una sola compresión aunque varias peticiones lo envíen a la
+    vez. Si un lector se desconecta, el siguiente sigue desde donde quedó.
+
+    on_finish(size) se llama al terminar con el tamaño comprimido, o con
+    None si chunks falló.
+    """
+
+    def __init__(self, chunks, encoding, on_finish=None):
+        self._source = iter(chunks)
+        self._compress, self._finish = _block_compressor(encoding)
+        self._on_finish = on_finish
+        self._parts = []
+        self._size = 0
+        self._done = False
+        self._error = None
+        self._produce_lock = threading.Lock()
+
+    def __iter__(self):
+        position = 0
+        while True:
+            # _done se lee antes que _parts: se marca después del último bloque
+            done = self._done
+            if position < len(self._parts):
+                part = self._parts[position]
+                position += 1
+                if part:
+                    yield part
+                continue
+            if done:
+                if self._error is not None:
+                    raise self._error
+                return
+            with self._produce_lock:
+                if position == len(self._parts) and not self._done:
+                    self._advance()
+
+    def _advance(self):
+        """Comprime el próximo bloque de chunks (llamar con _produce_lock)"""
+        try:
+            chunk = next(self._source, None)
+            part = self._finish() if chunk is None else self._compress(chunk)
+        except BaseException as e:
+            self._error = e
+            self._source = None
+            self._done = True
+            if self._on_finish is not None:
+                self._on_finish(None)
+            raise
+        self._parts.append(part)
+        self._size += len(part)
+        if chunk is None:
+            self._source = None
+            self._done = True
+            if self._on_finish is not None:
+                self._on_finish(self._size)
+
+
+class VersionedCache:
+    """
+    Caché LRU de valores asociados a una versión de los datos. La versión
+    forma parte de la clave: una mutación no borra nada, simplemente las
+    entradas viejas dejan de pedirse y salen por LRU. El tamaño se limita
+    por cantidad de entradas y por bytes.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, version, key):
+        """Valor guardado para key en version, o None"""
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end((version, key))
+            self.hits += 1
+            return entry[0]
+
+    def put(self, version, key, value, size):
+        """Guarda value, que ocupa size bytes, descartando los menos usados"""
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            self._store(version, key, value, size)
+
+    def setdefault(self, version, key, value, size):
+        """
+        Como put, pero si ya hay un valor para key en version lo devuelve sin
+        reemplazarlo; si no, guarda value y lo devuelve
+        """
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is not None:
+                self._entries.move_to_end((version, key))
+                return entry[0]
+            if size <= self.max_bytes:
+                self._store(version, key, value, size)
+            return value
+
+    def resize(self, version, key, size):
+        """Actualiza el tamaño de una entrada, p. ej. al terminar de generarla"""
+        with self._lock:
+            entry = self._entries.get((version, key))
+            if entry is None:
+                return
+            if size > self.max_bytes:
+                self._bytes -= self._entries.pop((version, key))[1]
+                return
+            self._store(version, key, entry[0], size)
+
+    def discard(self, version, key):
+        """Quita la entrada de key en version, si existe"""
+        with self._lock:
+            entry = self._entries.pop((version, key), None)
+            if entry is not None:
+                self._bytes -= entry[1]
+
+    def _store(self, version, key, value, size):
+        """Guarda una entrada y aplica los límites (llamar con el lock tomado)"""
+        previous = self._entries.pop((version, key), None)
+        if previous is not None:
+            self._bytes -= previous[1]
+        self._entries[(version, key)] = (value, size)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, (_, evicted) = self._entries.popitem(last=False)
+            self._bytes -= evicted
+
+    def clear(self):
+        """Descarta todas las entradas"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        """Aciertos, fallos y ocupación"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
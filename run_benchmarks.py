@@ -0,0 +1,679 @@
+#!/usr/bin/env python3
+"""
+Script para ejecutar los benchmarks de almacenamiento del proyecto Lista de Tareas
+Mide la latencia de las operaciones del repositorio con distintos tamaños de datos
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+
+import serializers
+from task_store import JSONTaskStore, TaskStore, create_store
+
+
+class MemoryTaskStore(TaskStore):
+    """Repositorio sin persistencia para medir solo las estructuras en memoria"""
+
+    def __init__(self, tasks):
+        super().__init__()
+        self._initial = tasks
+
+    def _current_signature(self):
+        return 0
+
+    def _load(self):
+        return self._initial
+
+    def _persist(self, records):
+        return 0
+
+
+def make_tasks(count):
+    """Genera una lista de tareas sintéticas"""
+    return [
+        {
+            "id": i,
+            "text": f"Tarea de benchmark {i}",
+            "completed": i % 3 == 0,
+            "created_at": "2025-06-11T15:27:40.222501",
+        }
+        for i in range(1, count + 1)
+    ]
+
+
+def seed_file(path, count):
+    """Crea un archivo de tareas con count elementos"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(make_tasks(count), f, ensure_ascii=False)
+
+
+def seed_file_streaming(path, count):
+    """Como seed_file, pero escribiendo tarea por tarea para no ocupar memoria"""
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("[")
+        for i in range(1, count + 1):
+            task = {
+                "id": i,
+                "text": f"Tarea de benchmark {i}",
+                "completed": i % 3 == 0,
+                "created_at": "2025-06-11T15:27:40.222501",
+            }
+            f.write(("," if i > 1 else "") + json.dumps(task, ensure_ascii=False))
+        f.write("]")
+
+
+def time_calls(fn, repeat):
+    """Ejecuta fn repeat veces y devuelve las latencias en milisegundos"""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append((time.perf_counter() - start) * 1000)
+    return latencies
+
+
+def summarize(latencies):
+    """Mediana y percentil 95 de una lista de latencias"""
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return statistics.median(ordered), p95
+
+
+def print_header(title):
+    """Imprime el encabezado de una sección"""
+    print(f"\n{'=' * 60}")
+    print(f"📊 {title}")
+    print(f"{'=' * 60}")
+
+
+def bench_writes(args):
+    """Latencia de escritura (add y toggle) por modo de almacenamiento"""
+    print_header("LATENCIA DE ESCRITURA POR MODO DE ALMACENAMIENTO")
+    print(f"{'modo':<10} {'tareas':>10} {'op':<8} {'mediana ms':>12} {'p95 ms':>10}")
+
+    for mode in args.modes:
+        for size in args.sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "tasks.json")
+                seed_file(path, size)
+                store = create_store(path, mode)
+                store.all()  # Carga inicial fuera de la medición
+
+                def add():
+                    store.add({"text": "Nueva", "completed": False, "created_at": "x"})
+
+                def toggle():
+                    store.toggle(random.randint(1, size))
+
+                for name, fn in (("add", add), ("toggle", toggle)):
+                    median, p95 = summarize(time_calls(fn, args.repeat))
+                    print(
+                        f"{mode:<10} {size:>10} {name:<8} {median:>12.3f} {p95:>10.3f}"
+                    )
+
+                if hasattr(store, "wait_for_compaction"):
+                    store.wait_for_compaction()
+
+
+def linear_toggle(tasks, task_id):
+    """Toggle con búsqueda lineal sobre una lista (implementación anterior)"""
+    for task in tasks:
+        if task["id"] == task_id:
+            task["completed"] = not task["completed"]
+            break
+
+
+def linear_delete(tasks, task_id):
+    """Delete reconstruyendo la lista completa (implementación anterior)"""
+    return [task for task in tasks if task["id"] != task_id]
+
+
+def bench_mutations(args):
+    """Latencia de toggle/delete en memoria: lista lineal vs índice por id"""
+    print_header("TOGGLE/DELETE EN MEMORIA: LISTA vs ÍNDICE POR ID")
+    print(
+        f"{'estructura':<10} {'tareas':>10} {'op':<8} {'mediana ms':>12} {'p95 ms':>10}"
+    )
+
+    for size in args.sizes:
+        ids = random.sample(range(1, size + 1), args.repeat * 2)
+        toggle_ids, delete_ids = iter(ids[: args.repeat]), iter(ids[args.repeat :])
+
+        tasks = make_tasks(size)
+        state = {"tasks": tasks}
+
+        def list_toggle():
+            linear_toggle(state["tasks"], next(toggle_ids))
+
+        def list_delete():
+            state["tasks"] = linear_delete(state["tasks"], next(delete_ids))
+
+        for name, fn in (("toggle", list_toggle), ("delete", list_delete)):
+            median, p95 = summarize(time_calls(fn, args.repeat))
+            print(f"{'lista':<10} {size:>10} {name:<8} {median:>12.4f} {p95:>10.4f}")
+
+        toggle_ids, delete_ids = iter(ids[: args.repeat]), iter(ids[args.repeat :])
+        store = MemoryTaskStore(make_tasks(size))
+        store.all()
+
+        def index_toggle():
+            store.toggle(next(toggle_ids))
+
+        def index_delete():
+            store.delete(next(delete_ids))
+
+        for name, fn in (("toggle", index_toggle), ("delete", index_delete)):
+            median, p95 = summarize(time_calls(fn, args.repeat))
+            print(f"{'índice':<10} {size:>10} {name:<8} {median:>12.4f} {p95:>10.4f}")
+
+
+def bench_group_commit(args):
+    """Escrituras por segundo con y sin group commit según la concurrencia"""
+    print_header("THROUGHPUT DE ESCRITURA CON GROUP COMMIT")
+    print(
+        f"{'modo':<10} {'ventana ms':>10} {'hilos':>6} {'writes/s':>10} {'lote medio':>11}"
+    )
+
+    for mode in args.modes:
+        for window in args.windows:
+            for threads in args.threads:
+                with tempfile.TemporaryDirectory() as tmp:
+                    path = os.path.join(tmp, "tasks.json")
+                    seed_file(path, args.size)
+                    os.environ["TASKS_DB"] = os.path.join(tmp, "tasks.db")
+                    os.environ["TASK_GROUP_COMMIT_MS"] = str(window)
+                    store = create_store(path, mode)
+                    store.all()
+
+                    def worker():
+                        for _ in range(args.writes):
+                            store.add(
+                                {"text": "Nueva", "completed": False, "created_at": "x"}
+                            )
+
+                    pool = [threading.Thread(target=worker) for _ in range(threads)]
+                    start = time.perf_counter()
+                    for thread in pool:
+                        thread.start()
+                    for thread in pool:
+                        thread.join()
+                    elapsed = time.perf_counter() - start
+
+                    batch = store.stats().get("group_commit", {}).get("avg_batch", 1)
+                    rate = threads * args.writes / elapsed
+                    print(
+                        f"{mode:<10} {window:>10g} {threads:>6} {rate:>10.0f} {batch:>11}"
+                    )
+
+                    if hasattr(store, "wait_for_compaction"):
+                        store.wait_for_compaction()
+    os.environ.pop("TASK_GROUP_COMMIT_MS", None)
+
+
+def bench_pagination(args):
+    """Latencia de una página por cursor frente a la lista completa"""
+    print_header("GET /api/tasks: LISTA COMPLETA vs PÁGINA POR CURSOR")
+    print(f"{'consulta':<14} {'tareas':>10} {'mediana ms':>12} {'p95 ms':>10}")
+
+    for size in args.sizes:
+        store = MemoryTaskStore(make_tasks(size))
+        store.all()
+        cursors = [random.randint(1, size) for _ in range(args.repeat)]
+        cursor_iter = iter(cursors)
+
+        def full_list():
+            json.dumps(store.all())
+
+        def keyset_page():
+            tasks, _ = store.page(args.limit, after_id=next(cursor_iter))
+            json.dumps(tasks)
+
+        for name, fn in (("lista", full_list), (f"página {args.limit}", keyset_page)):
+            median, p95 = summarize(time_calls(fn, args.repeat))
+            print(f"{name:<14} {size:>10} {median:>12.3f} {p95:>10.3f}")
+
+
+def bench_queries(args):
+    """Consultas selectivas: índices secundarios vs recorrido de la lista"""
+    print_header("FILTROS EN /api/tasks: RECORRIDO vs ÍNDICES SECUNDARIOS")
+    print(f"{'consulta':<22} {'tareas':>10} {'recorrido ms':>13} {'índice ms':>10}")
+
+    for size in args.sizes:
+        # 1% completadas y una fecha distinta por tarea para que los filtros sean selectivos
+        tasks = [
+            dict(
+                task,
+                completed=task["id"] % 100 == 0,
+                created_at=f"2025-01-01T00:00:{task['id']:09d}",
+            )
+            for task in make_tasks(size)
+        ]
+        store = MemoryTaskStore(tasks)
+        store.all()
+        low = f"2025-01-01T00:00:{size // 2:09d}"
+        high = f"2025-01-01T00:00:{size // 2 + size // 1000:09d}"
+
+        cases = [
+            (
+                "completed=true",
+                lambda: [t for t in tasks if t["completed"]],
+                lambda: store.query(completed=True),
+            ),
+            (
+                "rango de fechas 0.1%",
+                lambda: [t for t in tasks if low < t["created_at"] < high],
+                lambda: store.query(created_after=low, created_before=high),
+            ),
+            (
+                "50 más recientes",
+                lambda: sorted(tasks, key=lambda t: t["created_at"], reverse=True)[:50],
+                lambda: store.query(limit=50, sort="created_at", descending=True),
+            ),
+        ]
+        for name, scan, indexed in cases:
+            scan_ms, _ = summarize(time_calls(scan, args.repeat))
+            index_ms, _ = summarize(time_calls(indexed, args.repeat))
+            print(f"{name:<22} {size:>10} {scan_ms:>13.3f} {index_ms:>10.3f}")
+
+
+def bench_render(args):
+    """Render de GET / con ventana de tareas frente a la lista completa"""
+    import app as app_module
+
+    print_header("GET /: RENDER CON VENTANA vs LISTA COMPLETA")
+    print(
+        f"{'render':<10} {'tareas':>10} {'mediana ms':>12} {'p95 ms':>10} {'bytes':>10}"
+    )
+
+    client = app_module.app.test_client()
+    for size in args.sizes:
+        store = MemoryTaskStore(make_tasks(size))
+        store.all()
+        app_module.store = store
+
+        def windowed():
+            # Sin la caché de páginas: se mide el render de cada petición
+            app_module.rendered_pages.clear()
+            return client.get("/").get_data()
+
+        def full_list():
+            with app_module.app.test_request_context("/"):
+                counts = store.counts()
+                return app_module.render_template(
+                    "index.html",
+                    tasks=store.all(),
+                    total=counts["total"],
+                    completed_count=counts["completed"],
+                )
+
+        cases = [("ventana", windowed)]
+        if size <= args.full_max:
+            cases.append(("completa", full_list))
+        for name, fn in cases:
+            size_bytes = len(fn())
+            median, p95 = summarize(time_calls(fn, args.repeat))
+            print(
+                f"{name:<10} {size:>10} {median:>12.3f} {p95:>10.3f} {size_bytes:>10}"
+            )
+
+
+def free_port():
+    """Puerto TCP libre en localhost"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def measure_startup(env, workdir):
+    """
+    Arranca app.py y devuelve los ms hasta la primera respuesta de /health
+    y los ms de la primera petición a GET /
+    """
+    port = free_port()
+    env = dict(env, PORT=str(port), HOST="127.0.0.1", FLASK_ENV="testing")
+    app_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, app_path],
+        env=env,
+        cwd=workdir,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while True:
+            if process.poll() is not None:
+                raise RuntimeError("app.py terminó antes de responder")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/health").read()
+                break
+            except OSError:
+                time.sleep(0.005)
+        ready = time.perf_counter()
+        urllib.request.urlopen(f"http://127.0.0.1:{port}/").read()
+        first_page = time.perf_counter()
+    finally:
+        process.terminate()
+        process.wait()
+    return (ready - start) * 1000, (first_page - ready) * 1000
+
+
+def bench_startup(args):
+    """Arranque en frío: sin warm-up, con warm-up y con caché de bytecode"""
+    print_header("ARRANQUE: IMPORT → PRIMERA RESPUESTA")
+    print(f"{'variante':<18} {'listo ms':>10} {'1er GET / ms':>14} {'total ms':>10}")
+
+    with tempfile.TemporaryDirectory() as workdir:
+        seed_file(os.path.join(workdir, "tasks.json"), args.tasks)
+        cache_dir = os.path.join(workdir, "jinja-cache")
+        base = {k: v for k, v in os.environ.items() if not k.startswith("TEMPLATE_")}
+        variants = [
+            ("perezoso", base),
+            ("warm-up", dict(base, TEMPLATE_WARMUP="1")),
+            (
+                "warm-up+bytecode",
+                dict(base, TEMPLATE_WARMUP="1", TEMPLATE_CACHE_DIR=cache_dir),
+            ),
+        ]
+        # Una corrida previa deja el bytecode en disco, como el primer worker
+        measure_startup(variants[-1][1], workdir)
+
+        for name, env in variants:
+            runs = [measure_startup(env, workdir) for _ in range(args.repeat)]
+            ready = statistics.median(r[0] for r in runs)
+            first = statistics.median(r[1] for r in runs)
+            total = statistics.median(r[0] + r[1] for r in runs)
+            print(f"{name:<18} {ready:>10.1f} {first:>14.1f} {total:>10.1f}")
+
+
+def format_candidates():
+    """(nombre, dumps, loads) de cada formato disponible, incluido el original"""
+    candidates = [
+        (
+            "stdlib indent=2",
+            lambda tasks: json.dumps(tasks, ensure_ascii=False, indent=2).encode(
+                "utf-8"
+            ),
+            lambda data: json.loads(data.decode("utf-8")),
+        ),
+        (
+            "stdlib compacto",
+            lambda tasks: json.dumps(
+                tasks, ensure_ascii=False, separators=(",", ":")
+            ).encode("utf-8"),
+            lambda data: json.loads(data.decode("utf-8")),
+        ),
+    ]
+    if serializers.orjson is not None:
+        serializer = serializers.JSONSerializer()
+        candidates.append(("orjson", serializer.dumps, serializer.loads))
+    if serializers.msgpack is not None:
+        serializer = serializers.MsgpackSerializer()
+        candidates.append(("msgpack", serializer.dumps, serializer.loads))
+    return candidates
+
+
+def bench_formats(args):
+    """Tiempo de carga/guardado y tamaño del snapshot por formato"""
+    print_header("CARGA/GUARDADO Y TAMAÑO POR FORMATO DE SERIALIZACIÓN")
+    print(
+        f"{'formato':<16} {'tareas':>10} {'save ms':>10} {'load ms':>10} {'tamaño KB':>11}"
+    )
+
+    for size in args.sizes:
+        tasks = make_tasks(size)
+        for name, dumps, loads in format_candidates():
+            with tempfile.TemporaryDirectory() as tmp:
+                path = os.path.join(tmp, "tasks.json")
+
+                def save():
+                    with open(path, "wb") as f:
+                        f.write(dumps(tasks))
+
+                def load():
+                    with open(path, "rb") as f:
+                        loads(f.read())
+
+                save_ms = statistics.median(time_calls(save, args.repeat))
+                load_ms = statistics.median(time_calls(load, args.repeat))
+                kilobytes = os.path.getsize(path) / 1024
+                print(
+                    f"{name:<16} {size:>10} {save_ms:>10.2f} {load_ms:>10.2f} {kilobytes:>11.0f}"
+                )
+
+
+def measure_peak_rss(strategy, path, queue):
+    """Ejecuta una estrategia de lectura en un proceso limpio y mide su pico de RSS"""
+    import resource
+
+    store = JSONTaskStore(path)
+    store.use_mmap = strategy == "stream-mmap"
+    baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    count = len(store.all()) if strategy == "lista" else store.count()
+    elapsed = time.perf_counter() - start
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    queue.put((count, elapsed, baseline, peak))
+
+
+def bench_memory(args):
+    """Pico de RSS al contar tareas: lista completa vs lectura en streaming"""
+    print_header("PICO DE MEMORIA: LISTA COMPLETA vs STREAMING")
+    print(
+        f"{'estrategia':<12} {'tareas':>10} {'segundos':>10} {'pico MB':>10} {'extra MB':>10}"
+    )
+
+    # Cada medición corre en un proceso nuevo: ru_maxrss nunca baja
+    context = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "tasks.json")
+        seed_file_streaming(path, args.size)
+        for strategy in ("lista", "stream", "stream-mmap"):
+            queue = context.Queue()
+            process = context.Process(
+                target=measure_peak_rss, args=(strategy, path, queue)
+            )
+            process.start()
+            count, elapsed, baseline, peak = queue.get()
+            process.join()
+            # ru_maxrss está en KB en Linux
+            print(
+                f"{strategy:<12} {count:>10} {elapsed:>10.2f} "
+                f"{peak / 1024:>10.1f} {(peak - baseline) / 1024:>10.1f}"
+            )
+
+
+def main():
+    """Función principal"""
+    parser = argparse.ArgumentParser(
+        description="Ejecuta los benchmarks del proyecto Lista de Tareas",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Ejemplos de uso:
+  python run_benchmarks.py writes                          # todos los modos
+  python run_benchmarks.py writes --sizes 1000 1000000 --modes journal
+  python run_benchmarks.py mutations                       # 10k, 100k y 1M tareas
+  python run_benchmarks.py groupcommit --windows 0 2 5     # 1, 8 y 32 hilos
+  python run_benchmarks.py formats --sizes 1000 100000     # json, orjson y msgpack
+  python run_benchmarks.py memory --size 1000000           # pico de RSS
+  python run_benchmarks.py pagination --limit 50           # página vs lista
+  python run_benchmarks.py queries --sizes 100000 1000000  # filtros con índices
+  python run_benchmarks.py render --sizes 100 1000000      # GET / con ventana
+  python run_benchmarks.py startup --repeat 10             # arranque en frío
+        """,
+    )
+    subparsers = parser.add_subparsers(dest="benchmark", required=True)
+
+    writes = subparsers.add_parser("writes", help="Latencia de escritura por modo")
+    writes.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Cantidades de tareas a probar (default: 1000 10000 100000)",
+    )
+    writes.add_argument(
+        "--modes",
+        nargs="+",
+        default=["json", "journal", "sharded", "sqlite"],
+        help="Modos de almacenamiento (default: json journal sharded sqlite)",
+    )
+    writes.add_argument(
+        "--repeat", type=int, default=50, help="Operaciones por medición (default: 50)"
+    )
+    writes.set_defaults(func=bench_writes)
+
+    mutations = subparsers.add_parser(
+        "mutations", help="Toggle/delete en memoria: lista vs índice por id"
+    )
+    mutations.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10000, 100000, 1000000],
+        help="Cantidades de tareas a probar (default: 10000 100000 1000000)",
+    )
+    mutations.add_argument(
+        "--repeat", type=int, default=50, help="Operaciones por medición (default: 50)"
+    )
+    mutations.set_defaults(func=bench_mutations)
+
+    group = subparsers.add_parser(
+        "groupcommit", help="Escrituras por segundo con y sin group commit"
+    )
+    group.add_argument(
+        "--modes",
+        nargs="+",
+        default=["json", "journal"],
+        help="Modos de almacenamiento (default: json journal)",
+    )
+    group.add_argument(
+        "--windows",
+        type=float,
+        nargs="+",
+        default=[0, 2, 5],
+        help="Ventanas de agrupación en ms, 0 = desactivado (default: 0 2 5)",
+    )
+    group.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        default=[1, 8, 32],
+        help="Hilos escribiendo a la vez (default: 1 8 32)",
+    )
+    group.add_argument(
+        "--size", type=int, default=1000, help="Tareas iniciales (default: 1000)"
+    )
+    group.add_argument(
+        "--writes", type=int, default=20, help="Escrituras por hilo (default: 20)"
+    )
+    group.set_defaults(func=bench_group_commit)
+
+    formats = subparsers.add_parser(
+        "formats", help="Carga/guardado y tamaño por formato de serialización"
+    )
+    formats.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[1000, 10000, 100000],
+        help="Cantidades de tareas a probar (default: 1000 10000 100000)",
+    )
+    formats.add_argument(
+        "--repeat", type=int, default=5, help="Repeticiones por medición (default: 5)"
+    )
+    formats.set_defaults(func=bench_formats)
+
+    memory = subparsers.add_parser(
+        "memory", help="Pico de RSS: lista completa vs lectura en streaming"
+    )
+    memory.add_argument(
+        "--size",
+        type=int,
+        default=1000000,
+        help="Tareas del archivo (default: 1000000)",
+    )
+    memory.set_defaults(func=bench_memory)
+
+    pagination = subparsers.add_parser(
+        "pagination", help="Página por cursor vs lista completa"
+    )
+    pagination.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[10000, 100000, 1000000],
+        help="Cantidades de tareas a probar (default: 10000 100000 1000000)",
+    )
+    pagination.add_argument(
+        "--limit", type=int, default=50, help="Tamaño de página (default: 50)"
+    )
+    pagination.add_argument(
+        "--repeat", type=int, default=20, help="Consultas por medición (default: 20)"
+    )
+    pagination.set_defaults(func=bench_pagination)
+
+    queries = subparsers.add_parser(
+        "queries", help="Filtros selectivos: índices secundarios vs recorrido"
+    )
+    queries.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100000, 1000000],
+        help="Cantidades de tareas a probar (default: 100000 1000000)",
+    )
+    queries.add_argument(
+        "--repeat", type=int, default=10, help="Consultas por medición (default: 10)"
+    )
+    queries.set_defaults(func=bench_queries)
+
+    render = subparsers.add_parser(
+        "render", help="Render de la página principal con ventana vs lista completa"
+    )
+    render.add_argument(
+        "--sizes",
+        type=int,
+        nargs="+",
+        default=[100, 10000, 100000, 1000000],
+        help="Cantidades de tareas a probar (default: 100 10000 100000 1000000)",
+    )
+    render.add_argument(
+        "--full-max",
+        type=int,
+        default=100000,
+        help="Mayor cantidad para la que se mide la lista completa (default: 100000)",
+    )
+    render.add_argument(
+        "--repeat", type=int, default=20, help="Renders por medición (default: 20)"
+    )
+    render.set_defaults(func=bench_render)
+
+    startup = subparsers.add_parser(
+        "startup", help="Tiempo desde el arranque hasta la primera respuesta"
+    )
+    startup.add_argument(
+        "--tasks", type=int, default=1000, help="Tareas en el archivo (default: 1000)"
+    )
+    startup.add_argument(
+        "--repeat", type=int, default=10, help="Arranques por variante (default: 10)"
+    )
+    startup.set_defaults(func=bench_startup)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
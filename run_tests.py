@@ -9,6 +9,7 @@ import sys
 import time
 import os
 import argparse
+import tempfile
 import threading
 from pathlib import Path
 
@@ -54,13 +55,21 @@ class TestRunner:
             print(f"❌ Comando excedió el timeout de {timeout} segundos")
             return False, "Timeout"
 
-    def start_flask_app(self, port=5000):
+    def start_flask_app(self, port=5000, store=None):
         """Inicia la aplicación Flask en background"""
         print(f"🚀 Iniciando aplicación Flask en puerto {port}...")
 
         env = os.environ.copy()
         env["FLASK_ENV"] = "testing"
         env["PORT"] = str(port)
+        # Plantillas compiladas al arrancar y bytecode compartido entre corridas
+        env["TEMPLATE_WARMUP"] = "1"
+        env["TEMPLATE_CACHE_DIR"] = os.path.join(
+            tempfile.gettempdir(), "lista-tareas-jinja"
+        )
+        if store:
+            # Backend de almacenamiento (json, journal, sharded, sqlite)
+            env["TASK_STORE"] = store
 
         try:
             self.flask_process = subprocess.Popen(
@@ -228,7 +237,7 @@ class TestRunner:
 
             # 2. Iniciar Flask para las pruebas
             if not args.skip_e2e or not args.skip_performance:
-                if not self.start_flask_app(port=args.port):
+                if not self.start_flask_app(port=args.port, store=args.store):
                     print(
                         "❌ No se pudo iniciar Flask. Saltando pruebas que requieren servidor."
                     )
@@ -316,6 +325,7 @@ Ejemplos de uso:
   python run_tests.py --e2e-only                  # Solo pruebas E2E
   python run_tests.py --performance-only --users 20 --duration 120
   python run_tests.py --quick                     # Pruebas rápidas
+  python run_tests.py --performance-only --store sqlite
         """,
     )
 
@@ -367,6 +377,11 @@ Ejemplos de uso:
         default=5000,
         help="Puerto para la aplicación Flask (default: 5000)",
     )
+    parser.add_argument(
+        "--store",
+        choices=["json", "journal", "sharded", "sqlite"],
+        help="Backend de almacenamiento de la app (default: TASK_STORE o json)",
+    )
     parser.add_argument("--verbose", action="store_true", help="Output detallado")
 
     args = parser.parse_args()
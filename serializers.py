@@ -0,0 +1,219 @@
+"""
+Formatos de serialización de los snapshots de tareas
+
+Formatos disponibles (variable de entorno TASK_FORMAT):
+    json     JSON compacto, con orjson si está instalado (por defecto)
+    pretty   JSON con indent=2, el formato original de tasks.json
+    msgpack  binario MessagePack (requiere el paquete msgpack)
+
+Al leer, el formato se detecta por el contenido del archivo, así que cambiar
+TASK_FORMAT no obliga a convertir los datos existentes: el snapshot se
+reescribe en el formato nuevo en la siguiente escritura.
+"""
+
+import codecs
+import json
+import mmap
+import os
+import warnings
+
+try:
+    import orjson
+except ImportError:  # Se usa el módulo json de la librería estándar
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# Primer byte de un array MessagePack: fixarray, array 16 y array 32
+_MSGPACK_ARRAY_PREFIXES = set(range(0x90, 0xA0)) | {0xDC, 0xDD}
+
+_WHITESPACE = " \t\r\n\ufeff"
+_decoder = json.JSONDecoder()
+
+
+class JSONSerializer:
+    """JSON compacto, o indentado con indent=2"""
+
+    def __init__(self, indent=False):
+        self.indent = indent
+        self.name = "pretty" if indent else "json"
+
+    def dumps(self, tasks):
+        if orjson is not None:
+            return orjson.dumps(tasks, option=orjson.OPT_INDENT_2 if self.indent else 0)
+        if self.indent:
+            text = json.dumps(tasks, ensure_ascii=False, indent=2)
+        else:
+            text = json.dumps(tasks, ensure_ascii=False, separators=(",", ":"))
+        return text.encode("utf-8")
+
+    def loads(self, data):
+        if orjson is not None:
+            return orjson.loads(data)
+        return json.loads(data.decode("utf-8"))
+
+
+class MsgpackSerializer:
+    """Snapshot binario MessagePack"""
+
+    name = "msgpack"
+
+    def dumps(self, tasks):
+        return msgpack.packb(tasks, use_bin_type=True)
+
+    def loads(self, data):
+        return msgpack.unpackb(data, raw=False)
+
+
+def get_serializer(name=None):
+    """Serializador para name o TASK_FORMAT; msgpack cae a JSON si no está instalado"""
+    name = (name or os.environ.get("TASK_FORMAT", "json")).lower()
+    if name == "json":
+        return JSONSerializer()
+    if name == "pretty":
+        return JSONSerializer(indent=True)
+    if name == "msgpack":
+        if msgpack is None:
+            warnings.warn("msgpack no está instalado; se usa JSON compacto")
+            return JSONSerializer()
+        return MsgpackSerializer()
+    raise ValueError(f"Formato de serialización desconocido: {name}")
+
+
+def detect_format(data):
+    """'msgpack' o 'json' según el primer byte del contenido"""
+    if data[:1] and data[0] in _MSGPACK_ARRAY_PREFIXES:
+        return "msgpack"
+    return "json"
+
+
+def loads(data):
+    """Decodifica un snapshot en cualquiera de los formatos soportados"""
+    if detect_format(data) == "msgpack":
+        if msgpack is None:
+            raise ValueError(
+                "el archivo está en formato msgpack y msgpack no está instalado"
+            )
+        return MsgpackSerializer().loads(data)
+    return JSONSerializer().loads(data)
+
+
+def iter_file(path, use_mmap=False, chunk_size=1 << 16):
+    """
+    Recorre las tareas de un snapshot de una en una, en cualquier formato.
+    La memoria usada es la de un bloque de chunk_size más una tarea, sin
+    importar el tamaño del archivo. Con use_mmap el archivo se lee a través
+    de un mapa de memoria en lugar de llamadas a read().
+    """
+    try:
+        f = open(path, "rb")
+    except FileNotFoundError:
+        return
+    with f:
+        yield from iter_open_file(f, use_mmap, chunk_size)
+
+
+def iter_open_file(f, use_mmap=False, chunk_size=1 << 16):
+    """Como iter_file, sobre un archivo ya abierto en modo binario"""
+    if os.fstat(f.fileno()).st_size == 0:
+        return
+    source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if use_mmap else f
+    try:
+        first = source.read(1)
+        source.seek(0)
+        if detect_format(first) == "msgpack":
+            yield from _iter_msgpack(source)
+        else:
+            yield from _iter_json_array(iter(lambda: source.read(chunk_size), b""))
+    finally:
+        if use_mmap:
+            source.close()
+
+
+def _iter_msgpack(source):
+    """Decodifica un array MessagePack elemento a elemento"""
+    if msgpack is None:
+        raise ValueError(
+            "el archivo está en formato msgpack y msgpack no está instalado"
+        )
+    unpacker = msgpack.Unpacker(source, raw=False)
+    try:
+        for _ in range(unpacker.read_array_header()):
+            yield unpacker.unpack()
+    except msgpack.OutOfData as e:
+        raise ValueError("snapshot msgpack incompleto") from e
+
+
+def _iter_json_array(chunks):
+    """Decodifica un array JSON elemento a elemento a partir de bloques de bytes"""
+    text = codecs.getincrementaldecoder("utf-8")()
+    buffer, pos, eof = "", 0, False
+    state = "start"  # start -> first -> (sep -> value)* -> ]
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in _WHITESPACE:
+            pos += 1
+        if pos == len(buffer) and not eof:
+            chunk = next(chunks, None)
+            eof = chunk is None
+            buffer, pos = buffer[pos:] + text.decode(chunk or b"", final=eof), 0
+            continue
+        if pos == len(buffer):
+            raise ValueError("snapshot JSON incompleto")
+
+        char = buffer[pos]
+        if state == "start":
+            if char != "[":
+                raise ValueError("el snapshot JSON no es una lista")
+            state, pos = "first", pos + 1
+        elif state == "sep" or (state == "first" and char == "]"):
+            if char == "]":
+                return
+            if char != ",":
+                raise ValueError(f"se esperaba ',' o ']' y se encontró {char!r}")
+            state, pos = "value", pos + 1
+        else:
+            try:
+                task, end = _decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+                # La tarea sigue en el próximo bloque
+                chunk = next(chunks, None)
+                eof = chunk is None
+                buffer, pos = buffer[pos:] + text.decode(chunk or b"", final=eof), 0
+                continue
+            yield task
+            state, pos = "sep", end
+
+
+def dumps_record(record):
+    """Una línea del log de cambios (siempre JSON, sin salto de línea)"""
+    if orjson is not None:
+        return orjson.dumps(record).decode("utf-8")
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def loads_record(line):
+    """Decodifica una línea del log de cambios"""
+    if orjson is not None:
+        return orjson.loads(line)
+    return json.loads(line)
+
+
+def convert_file(source, target, name):
+    """Reescribe el snapshot source en el formato name y lo guarda en target"""
+    with open(source, "rb") as f:
+        data = f.read()
+    tasks = loads(data) if data.strip() else []
+    serializer = get_serializer(name)
+    tmp_path = f"{target}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(serializer.dumps(tasks))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, target)
+    return len(tasks), serializer.name
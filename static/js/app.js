@@ -0,0 +1,7 @@
+// Pide confirmación antes de seguir los enlaces con data-confirm (eliminar tarea)
+document.addEventListener("click", function (event) {
+    var link = event.target.closest("a[data-confirm]");
+    if (link && !window.confirm(link.dataset.confirm)) {
+        event.preventDefault();
+    }
+});
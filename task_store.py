@@ -0,0 +1,1815 @@
+"""
+Repositorio de tareas compartido por todas las rutas de la aplicación
+
+Mantiene las tareas en memoria y solo vuelve a leer el almacenamiento cuando
+cambia su firma (por ejemplo porque otro proceso lo modificó). Las escrituras
+hechas por la propia app actualizan la caché directamente, sin releer nada.
+
+Backends disponibles (variable de entorno TASK_STORE):
+    json     reescribe el archivo completo en cada cambio (por defecto)
+    journal  agrega cada cambio a un log y compacta en segundo plano
+    sharded  un archivo por rango de ids; cada cambio reescribe su segmento
+    sqlite   base de datos SQLite en modo WAL (archivo TASKS_DB)
+
+Los backends de archivo guardan el snapshot en el formato TASK_FORMAT (ver
+serializers.py).
+"""
+
+import bisect
+import collections
+import contextlib
+import hashlib
+import heapq
+import itertools
+import math
+import os
+import sqlite3
+import threading
+import time
+
+import serializers
+
+try:
+    import fcntl
+except ImportError:  # Windows: solo hay exclusión dentro del proceso
+    fcntl = None
+
+
+class IdSequence:
+    """
+    Secuencia monótona de ids que reserva bloques en un almacenamiento
+    compartido. Cada proceso toma un bloque de block_size ids de una sola vez
+    y los reparte localmente, así que el almacenamiento compartido (y su
+    lock) solo se toca una vez por bloque. Dentro de un proceso los ids son
+    crecientes; entre procesos son únicos y ordenados por bloque.
+
+    reserve(count, floor) debe reservar count ids mayores que floor y que
+    cualquier reserva anterior, y devolver el primero.
+    """
+
+    def __init__(self, reserve, block_size=32):
+        self._reserve = reserve
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next_id(self, floor=0):
+        """Devuelve el siguiente id, siempre mayor que floor"""
+        with self._lock:
+            if self._next >= self._end or self._next <= floor:
+                self._next = self._reserve(self.block_size, floor)
+                self._end = self._next + self.block_size
+            task_id = self._next
+            self._next += 1
+            return task_id
+
+
+def reserve_from_file(path):
+    """Función de reserva de IdSequence que guarda el último id en path"""
+
+    def reserve(count, floor):
+        with _file_lock(path) as f:
+            f.seek(0)
+            content = f.read().strip()
+            start = max(int(content) if content else 0, floor) + 1
+            f.seek(0)
+            f.truncate()
+            f.write(str(start + count - 1).encode("ascii"))
+            f.flush()
+            os.fsync(f.fileno())
+        return start
+
+    return reserve
+
+
+# Antigüedad mínima de la fecha de un directorio para suponer que no hubo
+# otro cambio en el mismo tick del reloj del sistema de archivos
+DIRECTORY_RACY_NS = 2_000_000_000
+
+# Operaciones aceptadas por TaskStore.bulk()
+BULK_OPERATIONS = ("complete", "uncomplete", "toggle", "delete")
+
+
+class GroupCommitter:
+    """
+    Agrupa las mutaciones que llegan dentro de una ventana de tiempo y las
+    aplica en una sola transacción del repositorio, con una única escritura
+    y fsync. Quien envía una operación espera hasta que su lote es durable.
+    """
+
+    def __init__(self, store, window_ms):
+        self.store = store
+        self.window = window_ms / 1000
+        self._cond = threading.Condition()
+        self._queue = []
+        self._thread = None
+        self._pid = None
+        self.batches = 0
+        self.operations = 0
+
+    def submit(self, operation):
+        """Encola una operación y devuelve su resultado cuando es durable"""
+        pending = {"operation": operation, "done": threading.Event()}
+        with self._cond:
+            if self._thread is None or self._pid != os.getpid():
+                # Primer uso, o proceso hijo tras un fork sin el hilo escritor
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._queue.append(pending)
+            self._cond.notify()
+        pending["done"].wait()
+        if "error" in pending:
+            raise pending["error"]
+        return pending["result"]
+
+    def _run(self):
+        """Hilo escritor: espera la primera operación, la ventana, y aplica el lote"""
+        while True:
+            with self._cond:
+                while not self._queue:
+                    self._cond.wait()
+            time.sleep(self.window)
+            with self._cond:
+                batch, self._queue = self._queue, []
+            self.batches += 1
+            self.operations += len(batch)
+            self.store._run_batch(batch)
+
+    def stats(self):
+        """Tamaño medio de los lotes aplicados"""
+        return {
+            "window_ms": self.window * 1000,
+            "batches": self.batches,
+            "operations": self.operations,
+            "avg_batch": (
+                round(self.operations / self.batches, 2) if self.batches else 0
+            ),
+        }
+
+
+class SortedIndex:
+    """
+    Conjunto ordenado guardado en bloques de hasta 2 * LOAD elementos.
+    Agregar y quitar buscan el bloque con bisect y solo desplazan ese
+    bloque, así que cuestan O(log n + LOAD) y no O(n) como en una lista
+    única; between() empieza a recorrer en el primer elemento del rango.
+    """
+
+    LOAD = 512
+
+    def __init__(self, values=()):
+        ordered = sorted(set(values))
+        self._chunks = [
+            ordered[i : i + self.LOAD] for i in range(0, len(ordered), self.LOAD)
+        ]
+        self._maxes = [chunk[-1] for chunk in self._chunks]
+        self._len = len(ordered)
+
+    def __len__(self):
+        return self._len
+
+    def add(self, value):
+        """Agrega value si no está"""
+        if not self._chunks:
+            self._chunks.append([value])
+            self._maxes.append(value)
+            self._len = 1
+            return
+        k = min(bisect.bisect_left(self._maxes, value), len(self._chunks) - 1)
+        chunk = self._chunks[k]
+        position = bisect.bisect_left(chunk, value)
+        if position < len(chunk) and chunk[position] == value:
+            return
+        chunk.insert(position, value)
+        self._maxes[k] = chunk[-1]
+        self._len += 1
+        if len(chunk) > 2 * self.LOAD:
+            self._chunks[k : k + 1] = [chunk[: self.LOAD], chunk[self.LOAD :]]
+            self._maxes[k : k + 1] = [chunk[self.LOAD - 1], chunk[-1]]
+
+    def discard(self, value):
+        """Quita value si está"""
+        k = bisect.bisect_left(self._maxes, value)
+        if k == len(self._chunks):
+            return
+        chunk = self._chunks[k]
+        position = bisect.bisect_left(chunk, value)
+        if position == len(chunk) or chunk[position] != value:
+            return
+        del chunk[position]
+        self._len -= 1
+        if chunk:
+            self._maxes[k] = chunk[-1]
+        else:
+            del self._chunks[k]
+            del self._maxes[k]
+
+    def between(self, low=None, high=None, descending=False):
+        """Valores v con low < v < high (None: sin límite), en orden"""
+        if not self._chunks:
+            return
+        if descending:
+            if high is None:
+                k = len(self._chunks) - 1
+                end = len(self._chunks[k])
+            else:
+                k = bisect.bisect_left(self._maxes, high)
+                if k == len(self._chunks):
+                    k -= 1
+                    end = len(self._chunks[k])
+                else:
+                    end = bisect.bisect_left(self._chunks[k], high)
+            for number in range(k, -1, -1):
+                chunk = self._chunks[number]
+                stop = end if number == k else len(chunk)
+                for position in range(stop - 1, -1, -1):
+                    value = chunk[position]
+                    if low is not None and value <= low:
+                        return
+                    yield value
+        else:
+            k, start = 0, 0
+            if low is not None:
+                k = bisect.bisect_right(self._maxes, low)
+                if k == len(self._chunks):
+                    return
+                start = bisect.bisect_right(self._chunks[k], low)
+            for number in range(k, len(self._chunks)):
+                chunk = self._chunks[number]
+                for position in range(start if number == k else 0, len(chunk)):
+                    value = chunk[position]
+                    if high is not None and value >= high:
+                        return
+                    yield value
+
+    def walk(self, after=None, descending=False):
+        """Recorre los valores a partir del cursor after en el sentido del orden"""
+        if descending:
+            return self.between(high=after, descending=True)
+        return self.between(low=after)
+
+
+class TaskStore:
+    """
+    Interfaz común de los repositorios de tareas
+
+    Mantiene las tareas en memoria en un dict id -> tarea. Como los dict
+    conservan el orden de inserción, el mismo índice sirve para buscar por id
+    en O(1) y para recorrer las tareas en el orden en que se muestran.
+
+    Índices secundarios, actualizados por cada mutación, para query():
+        _order          SortedIndex de ids, para paginar por cursor sin
+                        pasar por los ids borrados
+        _completed      conjunto de ids completados
+        _completed_ids  los mismos ids en un SortedIndex, para paginarlos
+                        por cursor sin ordenarlos en cada consulta
+        _pending_ids    SortedIndex de los ids pendientes, con el mismo fin
+        _by_created     SortedIndex de (created_at, id) para buscar rangos
+                        de fechas y paginar por fecha
+
+    La persistencia se delega en tres métodos que implementa cada backend:
+        _current_signature()  token que cambia cuando otro proceso modifica
+                              los datos
+        _load()               lee todas las tareas del almacenamiento
+        _persist(records)     guarda los cambios de una transacción, ya
+                              aplicados en memoria, y devuelve la firma
+                              resultante
+
+    Opcionalmente, _stream() recorre las tareas almacenadas de una en una
+    para que iter_tasks() y count() no carguen la lista completa cuando la
+    caché está fría.
+
+    Las mutaciones corren dentro de _transaction(): lock entre hilos, más el
+    lock entre procesos que aporta _write_guard() de cada backend, más una
+    recarga si otro proceso cambió los datos. Así la lectura-modificación-
+    escritura es atómica aunque haya varios workers sirviendo la app.
+
+    Con group_commit_ms > 0 las mutaciones de varios hilos que llegan dentro
+    de esa ventana se agrupan en una sola transacción (ver GroupCommitter).
+
+    Las últimas change_buffer mutaciones quedan en un buffer circular para
+    que changes() devuelva solo lo que cambió desde una versión dada;
+    wait_for_version() bloquea hasta la próxima versión. Versiones y buffer
+    son de este proceso salvo que shared_changes sea True.
+    """
+
+    # version(), epoch() y changes() valen igual en todos los procesos
+    shared_changes = False
+
+    def __init__(self, group_commit_ms=0, change_buffer=1000):
+        self._lock = threading.RLock()
+        # Se notifica con el lock tomado cada vez que cambia _version
+        self._changed = threading.Condition(self._lock)
+        self._transaction_owner = None
+        self._pending = []
+        self._committer = (
+            GroupCommitter(self, group_commit_ms) if group_commit_ms else None
+        )
+        self._tasks = None
+        self._signature = None
+        self._max_id = 0
+        self._id_floor = None
+        self._order = SortedIndex()
+        self._completed = set()
+        self._completed_ids = SortedIndex()
+        self._pending_ids = SortedIndex()
+        self._by_created = SortedIndex()
+        self._ids = None
+        self._version = 0
+        self._epoch = None
+        self._epoch_pid = None
+        # (versión, id, tarea o None si se borró), de la más antigua a la nueva
+        self._changes = collections.deque(maxlen=change_buffer)
+        self._changes_floor = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _current_signature(self):
+        raise NotImplementedError
+
+    def _load(self):
+        raise NotImplementedError
+
+    def _persist(self, records):
+        raise NotImplementedError
+
+    def _stream(self):
+        """Recorre las tareas almacenadas (por defecto las lee todas con _load)"""
+        return iter(self._load())
+
+    def _count_stored(self):
+        """Cuenta las tareas almacenadas sin cargarlas en la caché"""
+        return sum(1 for _ in self._stream())
+
+    def _write_guard(self):
+        """Lock entre procesos para las escrituras (por defecto ninguno)"""
+        return contextlib.nullcontext()
+
+    @contextlib.contextmanager
+    def _transaction(self):
+        """Sección de lectura-modificación-escritura protegida entre procesos"""
+        if self._in_transaction():
+            # Transacción anidada en el mismo hilo: ya tenemos los locks
+            yield
+            return
+        with self._lock:
+            try:
+                with self._write_guard():
+                    self._transaction_owner = threading.get_ident()
+                    self._pending = []
+                    try:
+                        self._refresh()
+                        yield
+                        if self._pending:
+                            self._signature = self._persist(self._pending)
+                            self._version += 1
+                            self._record_changes(self._pending)
+                            self._changed.notify_all()
+                    finally:
+                        self._transaction_owner = None
+                        self._pending = []
+            except BaseException:
+                # La memoria puede no coincidir con el almacenamiento
+                self._tasks = None
+                raise
+
+    def _in_transaction(self):
+        """Indica si el hilo actual está dentro de _transaction()"""
+        return self._transaction_owner == threading.get_ident()
+
+    def _allocate_id(self):
+        """Siguiente id de la secuencia persistente (llamar con el lock tomado)"""
+        if self._id_floor is None:
+            # Ids importados antes de que existiera la secuencia. Se fija una
+            # sola vez: los ids de otros workers ya salen de la secuencia, y
+            # usarlos como piso descartaría el bloque propio en cada alta
+            self._id_floor = self._max_id
+        task_id = self._ids.next_id(floor=self._id_floor)
+        self._max_id = max(self._max_id, task_id)
+        return task_id
+
+    def _commit(self, record):
+        """Registra un cambio que se persiste al cerrar la transacción"""
+        self._pending.append(record)
+
+    def _execute(self, operation):
+        """Ejecuta una mutación en su propia transacción o en el próximo lote"""
+        if self._committer is None or self._in_transaction():
+            with self._transaction():
+                return operation()
+        return self._committer.submit(operation)
+
+    def _run_batch(self, batch):
+        """Aplica un lote del GroupCommitter en una sola transacción"""
+        try:
+            with self._transaction():
+                for pending in batch:
+                    pending["result"] = pending["operation"]()
+        except BaseException as e:
+            # Si falla la escritura del lote, falla para todas sus operaciones
+            for pending in batch:
+                pending["error"] = e
+        finally:
+            for pending in batch:
+                pending["done"].set()
+
+    def _refresh(self):
+        """Recarga las tareas si cambiaron (llamar con el lock tomado)"""
+        signature = self._current_signature()
+        if self._tasks is not None and signature == self._signature:
+            self.hits += 1
+            return
+        self.misses += 1
+        self._set_tasks(self._load())
+        self._signature = signature
+        self._version += 1
+        # No se sabe qué cambió otro proceso: los clientes deben resincronizar
+        self._reset_changes()
+        self._changed.notify_all()
+
+    def _record_changes(self, records):
+        """Agrega los cambios de una transacción al buffer de changes()"""
+        for record in records:
+            if record["op"] == "replace":
+                self._reset_changes()
+                continue
+            if len(self._changes) == self._changes.maxlen:
+                # Se descarta el cambio más antiguo: las versiones anteriores
+                # a la suya ya no se pueden servir como delta
+                self._changes_floor = (
+                    self._changes[0][0] if self._changes else self._version
+                )
+            if record["op"] == "put":
+                task = record["task"]
+                self._changes.append((self._version, task["id"], task))
+            else:
+                self._changes.append((self._version, record["id"], None))
+
+    def _reset_changes(self):
+        """Vacía el buffer de cambios: solo se sirven deltas desde la versión actual"""
+        self._changes.clear()
+        self._changes_floor = self._version
+
+    def _cached(self):
+        """Las tareas en memoria si están al día, o None (llamar con el lock tomado)"""
+        if self._tasks is None or self._current_signature() != self._signature:
+            return None
+        self.hits += 1
+        return self._tasks
+
+    def _set_tasks(self, tasks):
+        """Reconstruye el índice por id a partir de una lista de tareas"""
+        self._tasks = {task["id"]: task for task in _unique_ids(tasks)}
+        self._max_id = max(self._tasks, default=0)
+        self._order = SortedIndex(self._tasks)
+        self._completed = {i for i, task in self._tasks.items() if task["completed"]}
+        self._completed_ids = SortedIndex(self._completed)
+        self._pending_ids = SortedIndex(
+            i for i in self._tasks if i not in self._completed
+        )
+        self._by_created = SortedIndex(
+            (task.get("created_at", ""), i) for i, task in self._tasks.items()
+        )
+
+    def _index_task(self, task):
+        """Agrega una tarea nueva a los índices secundarios (llamar con el lock tomado)"""
+        task_id = task["id"]
+        if task["completed"]:
+            self._completed.add(task_id)
+            self._completed_ids.add(task_id)
+        else:
+            self._pending_ids.add(task_id)
+        self._by_created.add((task.get("created_at", ""), task_id))
+        self._order.add(task_id)
+
+    def _unindex_task(self, task):
+        """Quita una tarea borrada de los índices secundarios"""
+        task_id = task["id"]
+        self._completed.discard(task_id)
+        self._completed_ids.discard(task_id)
+        self._pending_ids.discard(task_id)
+        self._by_created.discard((task.get("created_at", ""), task_id))
+        self._order.discard(task_id)
+
+    def _snapshot(self):
+        """Lista de tareas en orden de visualización (llamar con el lock tomado)"""
+        return list(self._tasks.values())
+
+    def all(self):
+        """Devuelve una copia de la lista de tareas"""
+        with self._lock:
+            self._refresh()
+            return self._snapshot()
+
+    def iter_tasks(self):
+        """
+        Recorre las tareas en orden de visualización. Si la caché está al día
+        se recorre la memoria; si no, se leen del almacenamiento de una en una
+        sin cargar la lista completa, con memoria constante.
+        """
+        with self._lock:
+            tasks = self._cached()
+            if tasks is not None:
+                return iter(list(tasks.values()))
+        return self._stream()
+
+    def count(self):
+        """Cantidad de tareas, sin cargar la lista completa si la caché está fría"""
+        with self._lock:
+            tasks = self._cached()
+            if tasks is not None:
+                return len(tasks)
+        return self._count_stored()
+
+    def counts(self):
+        """
+        Total de tareas y cuántas están completadas, en O(1): salen del
+        índice por id y del conjunto de completadas, que cada mutación ya
+        mantiene al día
+        """
+        with self._lock:
+            self._refresh()
+            return {"total": len(self._tasks), "completed": len(self._completed)}
+
+    def query(
+        self,
+        limit=None,
+        after_id=None,
+        completed=None,
+        created_after=None,
+        created_before=None,
+        sort="id",
+        descending=False,
+        after_key=None,
+    ):
+        """
+        Tareas filtradas y ordenadas usando los índices secundarios, sin
+        recorrer la lista completa. Devuelve (tareas, hay_más), donde hay_más
+        indica si quedan resultados después de los primeros limit.
+
+        completed filtra por estado; created_after/created_before son límites
+        exclusivos sobre created_at. sort es "id" o "created_at". Los cursores
+        continúan después de la última tarea vista en el sentido del orden:
+        after_id para sort="id" y after_key, el par (created_at, id), para
+        sort="created_at", ya que varias tareas pueden tener la misma fecha.
+        """
+        if after_id is not None and sort != "id":
+            raise ValueError("after_id solo se puede usar con sort='id'")
+        if after_key is not None and sort != "created_at":
+            raise ValueError("after_key solo se puede usar con sort='created_at'")
+        with self._lock:
+            self._refresh()
+            if (
+                sort == "created_at"
+                or created_after is not None
+                or created_before is not None
+            ):
+                low = None if created_after is None else (created_after, math.inf)
+                high = None if created_before is None else (created_before,)
+                if after_key is not None:
+                    after_key = tuple(after_key)
+                    if descending:
+                        high = after_key if high is None else min(high, after_key)
+                    else:
+                        low = after_key if low is None else max(low, after_key)
+                if sort == "created_at":
+                    entries = self._by_created.between(low, high, descending)
+                    ids = (i for _, i in entries)
+                else:
+                    ids = _walk(
+                        sorted(i for _, i in self._by_created.between(low, high)),
+                        after_id,
+                        descending,
+                    )
+                if completed is not None:
+                    ids = (i for i in ids if (i in self._completed) == completed)
+            elif completed is None:
+                ids = self._order.walk(after_id, descending)
+            elif completed:
+                ids = self._completed_ids.walk(after_id, descending)
+            else:
+                ids = self._pending_ids.walk(after_id, descending)
+
+            live = (self._tasks[i] for i in ids if i in self._tasks)
+            if limit is None:
+                return list(live), False
+            tasks = list(itertools.islice(live, limit + 1))
+        return tasks[:limit], len(tasks) > limit
+
+    def page(self, limit, after_id=None, before_id=None):
+        """
+        Hasta limit tareas ordenadas por id, posteriores a after_id o
+        anteriores a before_id (paginación por cursor). Devuelve (tareas,
+        hay_más), donde hay_más indica si quedan tareas en esa dirección. El
+        costo depende de limit y no del total de tareas.
+        """
+        if before_id is not None:
+            tasks, has_more = self.query(limit, after_id=before_id, descending=True)
+            return tasks[::-1], has_more
+        return self.query(limit, after_id=after_id)
+
+    def replace(self, tasks):
+        """Reemplaza la lista completa de tareas"""
+        with self._transaction():
+            self._set_tasks(tasks)
+            # Las tareas importadas pueden traer ids que la secuencia no dio
+            self._id_floor = max(self._id_floor or 0, self._max_id)
+            self._commit({"op": "replace", "tasks": self._snapshot()})
+
+    def add(self, task):
+        """Agrega una tarea asignándole el siguiente id"""
+        return self.add_many([task])[0]
+
+    def add_many(self, tasks):
+        """
+        Agrega varias tareas en una sola transacción, es decir, con una sola
+        escritura al almacenamiento. Devuelve las tareas creadas con su id.
+        """
+
+        def operation():
+            return [self._put_new(dict(task, id=self._allocate_id())) for task in tasks]
+
+        return self._execute(operation)
+
+    def _insert_many(self, tasks):
+        """Agrega tareas que ya traen su id (lo usa ShardedTaskStore)"""
+
+        def operation():
+            for task in tasks:
+                self._max_id = max(self._max_id, task["id"])
+            return [self._put_new(task) for task in tasks]
+
+        return self._execute(operation)
+
+    def _put_new(self, task):
+        """Guarda una tarea nueva en memoria e índices (llamar en una transacción)"""
+        self._tasks[task["id"]] = task
+        self._index_task(task)
+        self._commit({"op": "put", "task": task})
+        return task
+
+    def toggle(self, task_id):
+        """Cambia el estado de completado de una tarea"""
+        return self.bulk("toggle", [task_id])[0].get("task")
+
+    def delete(self, task_id):
+        """Elimina una tarea"""
+        self.bulk("delete", [task_id])
+
+    def bulk(self, op, ids):
+        """
+        Aplica op (complete, uncomplete, toggle o delete) a varios ids en una
+        sola transacción. Devuelve un resultado por id, en el mismo orden:
+        {"id", "status": "updated" | "deleted" | "not_found", "task"}
+        """
+        if op not in BULK_OPERATIONS:
+            raise ValueError(f"Operación desconocida: {op}")
+
+        def operation():
+            return [self._apply(op, task_id) for task_id in ids]
+
+        return self._execute(operation)
+
+    def _apply(self, op, task_id):
+        """Aplica op a una tarea (llamar en una transacción)"""
+        if op == "delete":
+            task = self._tasks.pop(task_id, None)
+            if task is None:
+                return {"id": task_id, "status": "not_found"}
+            self._unindex_task(task)
+            self._commit({"op": "delete", "id": task_id})
+            return {"id": task_id, "status": "deleted"}
+
+        task = self._tasks.get(task_id)
+        if task is None:
+            return {"id": task_id, "status": "not_found"}
+        completed = not task["completed"] if op == "toggle" else op == "complete"
+        if completed != task["completed"]:
+            # Se reemplaza el dict para no alterar copias ya entregadas; al
+            # reasignar una clave existente se conserva su posición
+            task = dict(task, completed=completed)
+            self._tasks[task_id] = task
+            if completed:
+                self._completed.add(task_id)
+                self._completed_ids.add(task_id)
+                self._pending_ids.discard(task_id)
+            else:
+                self._completed.discard(task_id)
+                self._completed_ids.discard(task_id)
+                self._pending_ids.add(task_id)
+            self._commit({"op": "put", "task": task})
+        return {"id": task_id, "status": "updated", "task": task}
+
+    def version(self):
+        """
+        Versión de los datos en este proceso: crece en cada transacción con
+        cambios y en cada recarga por cambios de otro proceso
+        """
+        with self._lock:
+            self._refresh()
+            return self._version
+
+    def epoch(self):
+        """
+        Identificador de la serie de versiones de este proceso. version() es
+        un contador local, así que dos procesos (o un reinicio) pueden dar el
+        mismo número para datos distintos; el epoch los distingue.
+        """
+        with self._lock:
+            if self._epoch_pid != os.getpid():
+                self._epoch_pid = os.getpid()
+                self._epoch = os.urandom(4).hex()
+            return self._epoch
+
+    def changes(self, since):
+        """
+        Cambios posteriores a la versión since, servidos desde el buffer de
+        mutaciones recientes. Devuelve (versión, cambios), con un cambio por
+        tarea en orden de modificación: {"id", "task"}, donde task es la
+        tarea actual o None si se borró. cambios es None si since es más
+        antigua que el buffer (o no es de este proceso) y el cliente debe
+        volver a leer la lista completa.
+        """
+        with self._lock:
+            self._refresh()
+            if not self._changes_floor <= since <= self._version:
+                return self._version, None
+            latest = {}
+            for version, task_id, task in reversed(self._changes):
+                if version <= since:
+                    break
+                latest.setdefault(task_id, task)
+            changes = [{"id": i, "task": task} for i, task in latest.items()]
+            return self._version, changes[::-1]
+
+    def wait_for_version(self, version, timeout):
+        """
+        Espera hasta que la versión supere version o pasen timeout segundos
+        y devuelve la versión actual. Las escrituras de otros procesos no
+        despiertan la espera: se detectan al vencer timeout.
+        """
+        with self._changed:
+            self._refresh()
+            if not self._changed.wait_for(lambda: self._version > version, timeout):
+                self._refresh()
+            return self._version
+
+    def etag(self):
+        """
+        Validador de los datos actuales para ETag/If-None-Match. Se deriva de
+        la firma del almacenamiento, así que no carga ni serializa tareas y
+        coincide entre todos los procesos que comparten los datos.
+        """
+        with self._lock:
+            return _etag(self._current_signature())
+
+    def stats(self):
+        """Contadores de aciertos y fallos de la caché"""
+        with self._lock:
+            total = self.hits + self.misses
+            stats = {
+                "backend": type(self).__name__,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "tasks": len(self._tasks) if self._tasks is not None else 0,
+                "version": self._version,
+                "buffered_changes": len(self._changes),
+            }
+        if self._committer is not None:
+            stats["group_commit"] = self._committer.stats()
+        return stats
+
+
+class JSONTaskStore(TaskStore):
+    """
+    Repositorio que reescribe el archivo JSON completo en cada cambio
+
+    Las escrituras toman un lock fcntl sobre TASKS_FILE.lock y publican el
+    archivo nuevo con escritura a temporal + os.replace, así que un lector
+    nunca ve un archivo truncado aunque haya varios procesos.
+    """
+
+    def __init__(
+        self,
+        path,
+        id_block_size=32,
+        group_commit_ms=0,
+        serializer=None,
+        change_buffer=1000,
+    ):
+        super().__init__(group_commit_ms, change_buffer)
+        self.path = path
+        self.serializer = serializer or serializers.get_serializer()
+        # TASK_STREAM_MMAP=1 lee los recorridos en streaming con mmap
+        self.use_mmap = os.environ.get("TASK_STREAM_MMAP", "0") == "1"
+        self.lock_path = path + ".lock"
+        self._ids = IdSequence(reserve_from_file(path + ".seq"), id_block_size)
+
+    def _write_guard(self):
+        return _file_lock(self.lock_path)
+
+    def _current_signature(self):
+        """Firma del archivo en disco usada para detectar cambios externos"""
+        return _stat_signature(self.path)
+
+    def _load(self):
+        return _read_tasks(self.path)
+
+    def _stream(self):
+        return _iter_snapshot(_open_or_none(self.path), self.path, self.use_mmap)
+
+    def _persist(self, records):
+        # Un único volcado del estado final, sea cual sea el tamaño del lote
+        _write_tasks_atomic(self.path, self._snapshot(), self.serializer)
+        return self._current_signature()
+
+    def stats(self):
+        stats = super().stats()
+        stats["format"] = self.serializer.name
+        return stats
+
+
+class JournalTaskStore(JSONTaskStore):
+    """
+    Repositorio que agrega cada cambio a un log en lugar de reescribir el
+    archivo completo. El estado actual es el snapshot (TASKS_FILE) más la
+    reproducción del log. Al superar compact_threshold registros, el log se
+    rota y un hilo en segundo plano escribe un snapshot nuevo.
+    """
+
+    def __init__(
+        self,
+        path,
+        compact_threshold=1000,
+        id_block_size=32,
+        group_commit_ms=0,
+        serializer=None,
+        change_buffer=1000,
+    ):
+        super().__init__(
+            path, id_block_size, group_commit_ms, serializer, change_buffer
+        )
+        self.compact_threshold = compact_threshold
+        self.journal_path = path + ".log"
+        self.compacting_path = path + ".log.compacting"
+        self._journal_records = 0
+        self._compactor = None
+        self._generation = 0
+
+    def _current_signature(self):
+        return (
+            _stat_signature(self.path),
+            _stat_signature(self.compacting_path),
+            _stat_signature(self.journal_path),
+        )
+
+    def _load(self):
+        # Snapshot y logs se leen juntos para no mezclar estados de una rotación
+        if self._in_transaction():
+            guard = contextlib.nullcontext()
+        else:
+            guard = _file_lock(self.lock_path, shared=True)
+        with guard:
+            tasks = _unique_ids(_read_tasks(self.path))
+            by_id = {task["id"]: task for task in tasks}
+            _replay(by_id, self.compacting_path)
+            self._journal_records = _replay(by_id, self.journal_path)
+        return list(by_id.values())
+
+    def _stream(self):
+        # El snapshot se abre junto con la lectura de los logs; después se
+        # recorre sin lock, ya que os.replace no altera un archivo abierto
+        if self._in_transaction():
+            guard = contextlib.nullcontext()
+        else:
+            guard = _file_lock(self.lock_path, shared=True)
+        with guard:
+            snapshot = _open_or_none(self.path)
+            changes = {}
+            _replay(changes, self.compacting_path, keep_deletes=True)
+            _replay(changes, self.journal_path, keep_deletes=True)
+        return _merge_changes(
+            _iter_snapshot(snapshot, self.path, self.use_mmap), changes
+        )
+
+    def _persist(self, records):
+        if any(record["op"] == "replace" for record in records):
+            # El snapshot completo ya incluye el resto de cambios del lote
+            self._compact_now()
+            return self._current_signature()
+
+        lines = "".join(serializers.dumps_record(record) + "\n" for record in records)
+        # Se abre en cada escritura: otro proceso puede haber rotado el log
+        with open(self.journal_path, "a", encoding="utf-8") as f:
+            f.write(lines)
+            f.flush()
+            os.fsync(f.fileno())
+        self._journal_records += len(records)
+
+        if self._journal_records >= self.compact_threshold and self._compactor is None:
+            self._start_compaction()
+        return self._current_signature()
+
+    def _compact_now(self):
+        """Compacta de forma síncrona (llamar con el lock tomado)"""
+        # Invalida cualquier compactación en segundo plano en curso
+        self._generation += 1
+        _write_tasks_atomic(self.path, self._snapshot(), self.serializer)
+        for leftover in (self.compacting_path, self.journal_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+        self._journal_records = 0
+
+    def _start_compaction(self):
+        """Rota el log y lanza la compactación en segundo plano"""
+        if os.path.exists(self.compacting_path):
+            # Quedó un log a medio compactar (p. ej. tras una caída)
+            self._compact_now()
+            return
+
+        os.replace(self.journal_path, self.compacting_path)
+        self._journal_records = 0
+        snapshot = self._snapshot()
+        # El inodo identifica este log rotado frente a rotaciones de otros procesos
+        rotated = _stat_signature(self.compacting_path)[2]
+
+        self._compactor = threading.Thread(
+            target=self._compact,
+            args=(snapshot, self._generation, rotated),
+            daemon=True,
+        )
+        self._compactor.start()
+
+    def _compact(self, snapshot, generation, rotated):
+        """Escribe el snapshot fuera del lock y publica el resultado"""
+        tmp_path = f"{self.path}.{os.getpid()}.compact.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(self.serializer.dumps(snapshot))
+                f.flush()
+                os.fsync(f.fileno())
+            with self._lock, _file_lock(self.lock_path):
+                current = _stat_signature(self.compacting_path)
+                if (
+                    generation != self._generation
+                    or current is None
+                    or (current[2] != rotated)
+                ):
+                    # Otra compactación publicó un snapshot más reciente
+                    os.remove(tmp_path)
+                    return
+                os.replace(tmp_path, self.path)
+                os.remove(self.compacting_path)
+                if self._tasks is not None:
+                    self._signature = self._current_signature()
+        finally:
+            self._compactor = None
+
+    def wait_for_compaction(self, timeout=None):
+        """Espera a que termine la compactación en curso (útil en pruebas)"""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join(timeout)
+
+    def stats(self):
+        stats = super().stats()
+        stats["journal_records"] = self._journal_records
+        return stats
+
+
+class ShardedTaskStore:
+    """
+    Repositorio que reparte las tareas en segmentos por rango de id: el
+    segmento n guarda los ids n * shard_size + 1 a (n + 1) * shard_size en
+    TASKS_FILE.shards/shard-NNNNNN.json. Cada segmento es un JSONTaskStore
+    con su propia caché y su propio lock, así que una mutación reescribe solo
+    su segmento y las escrituras a segmentos distintos no compiten entre sí.
+    Los segmentos se cargan al usarse por primera vez.
+
+    manifest.json guarda el tamaño de segmento y la lista de segmentos
+    existentes; solo se reescribe al crear un segmento nuevo. Las tareas se
+    muestran ordenadas por segmento, es decir, por id.
+
+    counts(), version() y etag() no cargan segmentos: parten de la firma de
+    cada archivo. Los totales por segmento se guardan en counts.cache junto
+    con la firma de la que salieron, así que tras un reinicio solo se vuelven
+    a contar los segmentos que cambiaron. Como los segmentos se publican con
+    os.replace, mientras no cambie la fecha del directorio tampoco se vuelve
+    a consultar la firma de cada uno.
+
+    Ofrece la misma interfaz pública que TaskStore.
+    """
+
+    shared_changes = False
+
+    def __init__(
+        self,
+        path,
+        shard_size=1000,
+        id_block_size=32,
+        group_commit_ms=0,
+        serializer=None,
+    ):
+        self.path = path
+        self.directory = path + ".shards"
+        self.manifest_path = os.path.join(self.directory, "manifest.json")
+        self.lock_path = self.manifest_path + ".lock"
+        self.counts_path = os.path.join(self.directory, "counts.cache")
+        self.group_commit_ms = group_commit_ms
+        self.serializer = serializer or serializers.get_serializer()
+        self._lock = threading.RLock()
+        self._stores = {}
+        self._manifest = None
+        self._manifest_signature = None
+        self._ids = IdSequence(reserve_from_file(path + ".seq"), id_block_size)
+        self._floor = None
+        self._epoch = None
+        self._epoch_pid = None
+        self._version = 0
+        self._version_signatures = None
+        self._directory_signatures = None
+        self._segment_counts = None
+
+        os.makedirs(self.directory, exist_ok=True)
+        with _file_lock(self.lock_path):
+            if not os.path.exists(self.manifest_path):
+                self._import(_read_tasks(path), shard_size)
+        self.shard_size = self._read_manifest()["shard_size"]
+
+    def _import(self, tasks, shard_size):
+        """Primera ejecución: reparte las tareas del archivo único en segmentos"""
+        by_shard = {}
+        for task in _unique_ids(tasks):
+            by_shard.setdefault((task["id"] - 1) // shard_size, []).append(task)
+        for number, shard_tasks in by_shard.items():
+            _write_tasks_atomic(
+                self._segment_path(number), shard_tasks, self.serializer
+            )
+        self._write_manifest({"shard_size": shard_size, "shards": sorted(by_shard)})
+
+    def _read_manifest(self):
+        """Manifest actual (se relee solo si cambió en disco)"""
+        with self._lock:
+            signature = _stat_signature(self.manifest_path)
+            if signature != self._manifest_signature:
+                with open(self.manifest_path, encoding="utf-8") as f:
+                    self._manifest = serializers.loads_record(f.read())
+                self._manifest_signature = signature
+            return self._manifest
+
+    def _write_manifest(self, manifest):
+        """Publica el manifest (llamar con el lock de archivo tomado)"""
+        tmp_path = f"{self.manifest_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(serializers.dumps_record(manifest))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.manifest_path)
+
+    def _shard_numbers(self):
+        return self._read_manifest()["shards"]
+
+    def _shard_of(self, task_id):
+        return (task_id - 1) // self.shard_size
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"shard-{number:06d}.json")
+
+    def _store(self, number, create=False):
+        """Repositorio del segmento number, o None si no existe y create es False"""
+        if number not in self._shard_numbers():
+            if not create:
+                return None
+            with _file_lock(self.lock_path):
+                manifest = self._read_manifest()
+                if number not in manifest["shards"]:
+                    shards = sorted(manifest["shards"] + [number])
+                    self._write_manifest(dict(manifest, shards=shards))
+        with self._lock:
+            store = self._stores.get(number)
+            if store is None:
+                store = JSONTaskStore(
+                    self._segment_path(number),
+                    group_commit_ms=self.group_commit_ms,
+                    serializer=self.serializer,
+                )
+                self._stores[number] = store
+            return store
+
+    def _stores_in_order(self):
+        return [self._store(number) for number in self._shard_numbers()]
+
+    def _signatures(self):
+        """Firma de cada segmento existente, sin cargarlos: {número: firma}"""
+        directory = _stat_signature(self.directory)
+        with self._lock:
+            cached = self._directory_signatures
+            # Dos reemplazos dentro del mismo tick del reloj del sistema de
+            # archivos dejan la misma fecha: solo se confía en una fecha vieja
+            if (
+                cached is not None
+                and cached[0] == directory
+                and time.time_ns() - directory[0] > DIRECTORY_RACY_NS
+            ):
+                return cached[1]
+            signatures = {
+                number: _stat_signature(self._segment_path(number))
+                for number in self._shard_numbers()
+            }
+            self._directory_signatures = (directory, signatures)
+            return signatures
+
+    def all(self):
+        """Devuelve una copia de la lista de tareas"""
+        return [task for store in self._stores_in_order() for task in store.all()]
+
+    def iter_tasks(self):
+        """Recorre las tareas segmento por segmento (ver TaskStore.iter_tasks)"""
+        for store in self._stores_in_order():
+            yield from store.iter_tasks()
+
+    def count(self):
+        """Cantidad de tareas, sin cargar los segmentos"""
+        return self.counts()["total"]
+
+    def counts(self):
+        """
+        Totales (ver TaskStore.counts) sumados de todos los segmentos. Cada
+        segmento se cuenta solo si cambió su firma desde la última vez: si
+        está cargado se usan sus índices y si no se lee sin indexarlo.
+        """
+        with self._lock:
+            if self._segment_counts is None:
+                self._segment_counts = self._read_counts()
+            known = self._segment_counts
+            totals = {"total": 0, "completed": 0}
+            changed = False
+            for number, signature in self._signatures().items():
+                entry = known.get(number)
+                if entry is None or entry[0] != signature:
+                    entry = (signature, self._count_segment(number))
+                    known[number] = entry
+                    changed = True
+                for key, value in entry[1].items():
+                    totals[key] += value
+            if changed:
+                self._write_counts(known)
+            return totals
+
+    def _count_segment(self, number):
+        """Totales de un segmento (llamar con self._lock tomado)"""
+        store = self._stores.get(number)
+        if store is not None and store._tasks is not None:
+            return store.counts()
+        tasks = _read_tasks(self._segment_path(number))
+        return {
+            "total": len(tasks),
+            "completed": sum(1 for task in tasks if task["completed"]),
+        }
+
+    def _read_counts(self):
+        """Totales guardados por segmento: {número: (firma, totales)}"""
+        try:
+            with open(self.counts_path, encoding="utf-8") as f:
+                saved = serializers.loads_record(f.read())
+        except (FileNotFoundError, ValueError):
+            return {}
+        return {
+            int(number): (tuple(signature), totals)
+            for number, (signature, totals) in saved.items()
+        }
+
+    def _write_counts(self, known):
+        """Publica counts.cache; es una caché, así que no se sincroniza a disco"""
+        tmp_path = f"{self.counts_path}.{os.getpid()}.tmp"
+        saved = {
+            str(number): [list(signature), totals]
+            for number, (signature, totals) in known.items()
+            if signature is not None
+        }
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(serializers.dumps_record(saved))
+        os.replace(tmp_path, self.counts_path)
+
+    def query(self, limit=None, after_id=None, sort="id", descending=False, **filters):
+        """
+        Consulta con filtros (ver TaskStore.query). Con sort="id" los
+        segmentos se recorren en orden y solo se cargan los necesarios; con
+        sort="created_at" se mezclan los resultados de todos los segmentos.
+        """
+        wanted = None if limit is None else limit + 1
+        options = dict(filters, sort=sort, descending=descending)
+        numbers = self._shard_numbers()
+        if descending:
+            numbers = numbers[::-1]
+
+        if sort == "id":
+            if after_id is not None:
+                cursor = self._shard_of(after_id)
+                numbers = [
+                    n for n in numbers if (n <= cursor if descending else n >= cursor)
+                ]
+            tasks = []
+            for number in numbers:
+                remaining = None if wanted is None else wanted - len(tasks)
+                found, _ = self._store(number).query(remaining, after_id, **options)
+                tasks.extend(found)
+                if wanted is not None and len(tasks) >= wanted:
+                    break
+        else:
+            partials = [self._store(n).query(wanted, **options)[0] for n in numbers]
+            merged = heapq.merge(
+                *partials,
+                key=lambda task: (task.get("created_at", ""), task["id"]),
+                reverse=descending,
+            )
+            tasks = list(itertools.islice(merged, wanted))
+
+        if limit is None:
+            return tasks, False
+        return tasks[:limit], len(tasks) > limit
+
+    def page(self, limit, after_id=None, before_id=None):
+        """Página por cursor (ver TaskStore.page); solo carga los segmentos que recorre"""
+        if before_id is not None:
+            tasks, has_more = self.query(limit, after_id=before_id, descending=True)
+            return tasks[::-1], has_more
+        return self.query(limit, after_id=after_id)
+
+    def replace(self, tasks):
+        """
+        Reemplaza la lista completa de tareas. Cada segmento se reemplaza de
+        forma atómica, pero no el conjunto: es una operación de mantenimiento.
+        """
+        by_shard = {}
+        for task in _unique_ids(tasks):
+            by_shard.setdefault(self._shard_of(task["id"]), []).append(task)
+        for number in sorted(set(by_shard) | set(self._shard_numbers())):
+            self._store(number, create=True).replace(by_shard.get(number, []))
+
+    def add(self, task):
+        """Agrega una tarea asignándole el siguiente id"""
+        return self.add_many([task])[0]
+
+    def add_many(self, tasks):
+        """Agrega varias tareas con una transacción por segmento afectado"""
+        with self._lock:
+            if self._floor is None:
+                # Ids importados antes de que existiera la secuencia
+                shards = self._shard_numbers()
+                last = self._store(shards[-1]).all() if shards else []
+                self._floor = max((t["id"] for t in last), default=0)
+            new_tasks = [
+                dict(task, id=self._ids.next_id(floor=self._floor)) for task in tasks
+            ]
+        by_shard = {}
+        for task in new_tasks:
+            by_shard.setdefault(self._shard_of(task["id"]), []).append(task)
+        for number, shard_tasks in by_shard.items():
+            self._store(number, create=True)._insert_many(shard_tasks)
+        return new_tasks
+
+    def toggle(self, task_id):
+        """Cambia el estado de completado de una tarea"""
+        return self.bulk("toggle", [task_id])[0].get("task")
+
+    def delete(self, task_id):
+        """Elimina una tarea"""
+        self.bulk("delete", [task_id])
+
+    def bulk(self, op, ids):
+        """Mutación en lote (ver TaskStore.bulk), una transacción por segmento"""
+        if op not in BULK_OPERATIONS:
+            raise ValueError(f"Operación desconocida: {op}")
+        results = [{"id": task_id, "status": "not_found"} for task_id in ids]
+        positions = {}
+        for position, task_id in enumerate(ids):
+            positions.setdefault(self._shard_of(task_id), []).append(position)
+        for number, shard_positions in positions.items():
+            store = self._store(number)
+            if store is None:
+                continue
+            shard_results = store.bulk(op, [ids[i] for i in shard_positions])
+            for position, result in zip(shard_positions, shard_results):
+                results[position] = result
+        return results
+
+    def version(self):
+        """
+        Versión de los datos en este proceso (ver TaskStore.version): crece
+        cada vez que cambia la firma de algún segmento o el manifest
+        """
+        with self._lock:
+            signatures = (_stat_signature(self.manifest_path), self._signatures())
+            if signatures != self._version_signatures:
+                self._version_signatures = signatures
+                self._version += 1
+            return self._version
+
+    def epoch(self):
+        """Identificador de la serie de versiones (ver TaskStore.epoch)"""
+        with self._lock:
+            if self._epoch_pid != os.getpid():
+                self._epoch_pid = os.getpid()
+                self._epoch = os.urandom(4).hex()
+            return self._epoch
+
+    def changes(self, since):
+        """
+        Siempre pide resincronizar: la versión es la suma de la de cada
+        segmento y no identifica un orden único de cambios entre segmentos
+        """
+        return self.version(), None
+
+    def wait_for_version(self, version, timeout):
+        """Sin notificaciones entre segmentos: consulta la versión al vencer timeout"""
+        current = self.version()
+        if current > version:
+            return current
+        time.sleep(timeout)
+        return self.version()
+
+    def etag(self):
+        """Validador de los datos (ver TaskStore.etag) sin cargar ningún segmento"""
+        signatures = [_stat_signature(self.manifest_path)]
+        signatures.extend(self._signatures().values())
+        return _etag(signatures)
+
+    def stats(self):
+        """Contadores sumados de los segmentos cargados en memoria"""
+        with self._lock:
+            loaded = [
+                store.stats()
+                for store in self._stores.values()
+                if store._tasks is not None
+            ]
+        hits = sum(stats["hits"] for stats in loaded)
+        misses = sum(stats["misses"] for stats in loaded)
+        total = hits + misses
+        return {
+            "backend": type(self).__name__,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": round(hits / total, 4) if total else 0.0,
+            "tasks": sum(stats["tasks"] for stats in loaded),
+            "format": self.serializer.name,
+            "shard_size": self.shard_size,
+            "shards": len(self._shard_numbers()),
+            "loaded_shards": len(loaded),
+        }
+
+
+class SQLiteTaskStore(TaskStore):
+    """
+    Repositorio respaldado por SQLite en modo WAL
+
+    Las conexiones salen de un pool y se devuelven al terminar, ya que el
+    servidor de desarrollo crea un hilo nuevo por petición y una conexión por
+    hilo se perdería en cada request. Toggle y delete se traducen en una
+    única sentencia sobre la fila afectada. La tabla meta guarda un contador
+    de versión que se incrementa en cada escritura y sirve como firma para
+    detectar cambios hechos por otros procesos. Cada mutación corre dentro
+    de una transacción BEGIN IMMEDIATE, que hace de lock entre procesos.
+
+    Esa versión es también la de version(), y la tabla changes guarda las
+    últimas change_buffer mutaciones: changes() sirve los mismos deltas en
+    todos los procesos. El epoch se genera al crear la base y queda en meta.
+    """
+
+    shared_changes = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS tasks (
+            id INTEGER PRIMARY KEY,
+            text TEXT NOT NULL,
+            completed INTEGER NOT NULL DEFAULT 0,
+            created_at TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS idx_tasks_completed ON tasks (completed);
+        CREATE INDEX IF NOT EXISTS idx_tasks_created_at ON tasks (created_at);
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value INTEGER NOT NULL
+        );
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('version', 0);
+        INSERT OR IGNORE INTO meta (key, value) VALUES ('last_id', 0);
+        INSERT OR IGNORE INTO meta (key, value)
+            VALUES ('epoch', random() & 4294967295);
+        CREATE TABLE IF NOT EXISTS changes (
+            seq INTEGER PRIMARY KEY,
+            version INTEGER NOT NULL,
+            task_id INTEGER NOT NULL
+        );
+        -- Bases anteriores a la tabla changes: no hay deltas hasta aquí
+        INSERT OR IGNORE INTO meta (key, value)
+            SELECT 'changes_floor', value FROM meta WHERE key = 'version';
+    """
+
+    def __init__(
+        self,
+        path,
+        import_from=None,
+        id_block_size=32,
+        group_commit_ms=0,
+        change_buffer=1000,
+    ):
+        super().__init__(group_commit_ms, change_buffer)
+        self.path = path
+        self._pool = []
+        self._pool_lock = threading.Lock()
+        self._txn = None
+        self._ids = IdSequence(self._reserve_ids, id_block_size)
+        with self._connection() as conn:
+            is_new = conn.execute("SELECT count(*) FROM tasks").fetchone()[0] == 0
+        if is_new and import_from and os.path.exists(import_from):
+            # Primera ejecución: importar las tareas del archivo JSON
+            self.replace(_read_tasks(import_from))
+
+    @contextlib.contextmanager
+    def _connection(self):
+        """Toma una conexión del pool (o abre una nueva) y la devuelve al salir"""
+        if self._txn is not None and self._in_transaction():
+            # Dentro de una transacción se reutiliza su conexión
+            yield self._txn
+            return
+        with self._pool_lock:
+            conn = self._pool.pop() if self._pool else None
+        if conn is None:
+            conn = sqlite3.connect(
+                self.path, isolation_level=None, timeout=30, check_same_thread=False
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+        try:
+            yield conn
+        finally:
+            with self._pool_lock:
+                self._pool.append(conn)
+
+    @contextlib.contextmanager
+    def _write_guard(self):
+        with self._connection() as conn, _immediate(conn):
+            self._txn = conn
+            try:
+                yield
+            finally:
+                self._txn = None
+
+    def _current_signature(self):
+        with self._connection() as conn:
+            return self._read_version(conn)
+
+    def _read_version(self, conn):
+        return self._read_meta(conn, "version")
+
+    def _read_meta(self, conn, key):
+        return conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()[
+            0
+        ]
+
+    def version(self):
+        """Versión de meta.version: la misma en todos los procesos"""
+        with self._lock:
+            self._refresh()
+            return self._signature
+
+    def epoch(self):
+        """Identificador de la base (ver TaskStore.epoch), compartido entre procesos"""
+        with self._lock:
+            if self._epoch is None:
+                with self._connection() as conn:
+                    self._epoch = f"{self._read_meta(conn, 'epoch'):08x}"
+            return self._epoch
+
+    def changes(self, since):
+        """Cambios posteriores a since (ver TaskStore.changes) desde la tabla changes"""
+        with self._connection() as conn:
+            # Una transacción de lectura: versión, piso y cambios del mismo estado
+            conn.execute("BEGIN")
+            try:
+                version = self._read_version(conn)
+                floor = self._read_meta(conn, "changes_floor")
+                if not floor <= since <= version:
+                    return version, None
+                rows = conn.execute(
+                    "SELECT c.task_id, t.id, t.text, t.completed, t.created_at "
+                    "FROM (SELECT task_id, max(seq) AS seq FROM changes "
+                    "      WHERE version > ? GROUP BY task_id) AS c "
+                    "LEFT JOIN tasks AS t ON t.id = c.task_id ORDER BY c.seq",
+                    (since,),
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        return version, [
+            {"id": row[0], "task": _row_to_task(row[1:]) if row[1] else None}
+            for row in rows
+        ]
+
+    def wait_for_version(self, version, timeout):
+        """Espera una versión mayor (ver TaskStore.wait_for_version)"""
+        with self._changed:
+            self._refresh()
+            if not self._changed.wait_for(lambda: self._signature > version, timeout):
+                self._refresh()
+            return self._signature
+
+    def _load(self):
+        with self._connection() as conn:
+            rows = conn.execute(
+                "SELECT id, text, completed, created_at FROM tasks ORDER BY id"
+            ).fetchall()
+        return [_row_to_task(row) for row in rows]
+
+    def _stream(self):
+        with self._connection() as conn:
+            cursor = conn.execute(
+                "SELECT id, text, completed, created_at FROM tasks ORDER BY id"
+            )
+            try:
+                for row in cursor:
+                    yield _row_to_task(row)
+            finally:
+                cursor.close()
+
+    def _count_stored(self):
+        with self._connection() as conn:
+            return conn.execute("SELECT count(*) FROM tasks").fetchone()[0]
+
+    def _reserve_ids(self, count, floor):
+        """Reserva un bloque de ids en la tabla meta"""
+        with self._connection() as conn, _immediate(conn):
+            last_id = conn.execute(
+                "SELECT value FROM meta WHERE key = 'last_id'"
+            ).fetchone()[0]
+            start = max(last_id, floor) + 1
+            conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'last_id'", (start + count - 1,)
+            )
+        return start
+
+    def _persist(self, records):
+        # Se ejecuta dentro de la transacción abierta por _write_guard
+        conn = self._txn
+        for record in records:
+            if record["op"] == "put":
+                task = record["task"]
+                conn.execute(
+                    "INSERT OR REPLACE INTO tasks (id, text, completed, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (task["id"], task["text"], task["completed"], task["created_at"]),
+                )
+            elif record["op"] == "delete":
+                conn.execute("DELETE FROM tasks WHERE id = ?", (record["id"],))
+            elif record["op"] == "replace":
+                conn.execute("DELETE FROM tasks")
+                conn.executemany(
+                    "INSERT INTO tasks (id, text, completed, created_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    [
+                        (t["id"], t["text"], t["completed"], t["created_at"])
+                        for t in record["tasks"]
+                    ],
+                )
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'version'")
+        version = self._read_version(conn)
+        self._log_changes(conn, version, records)
+        return version
+
+    def _log_changes(self, conn, version, records):
+        """Agrega los cambios a la tabla changes y descarta los más antiguos"""
+        if any(record["op"] == "replace" for record in records):
+            # Cambió toda la lista: los clientes deben resincronizar
+            conn.execute("DELETE FROM changes")
+            conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'changes_floor'", (version,)
+            )
+            return
+        conn.executemany(
+            "INSERT INTO changes (version, task_id) VALUES (?, ?)",
+            [
+                (
+                    version,
+                    record["task"]["id"] if record["op"] == "put" else record["id"],
+                )
+                for record in records
+            ],
+        )
+        oldest = conn.execute(
+            "SELECT seq, version FROM changes ORDER BY seq DESC LIMIT 1 OFFSET ?",
+            (self._changes.maxlen,),
+        ).fetchone()
+        if oldest is not None:
+            # Las versiones anteriores a la del cambio descartado ya no se
+            # pueden servir como delta
+            conn.execute("DELETE FROM changes WHERE seq <= ?", (oldest[0],))
+            conn.execute(
+                "UPDATE meta SET value = max(value, ?) WHERE key = 'changes_floor'",
+                (oldest[1],),
+            )
+
+
+def create_store(path, mode=None):
+    """Crea el repositorio según el modo indicado o la variable TASK_STORE"""
+    mode = (mode or os.environ.get("TASK_STORE", "json")).lower()
+    options = {
+        "id_block_size": int(os.environ.get("TASK_ID_BLOCK_SIZE", 32)),
+        "group_commit_ms": float(os.environ.get("TASK_GROUP_COMMIT_MS", 0)),
+        "change_buffer": int(os.environ.get("TASK_CHANGE_BUFFER", 1000)),
+    }
+    if mode == "json":
+        return JSONTaskStore(path, **options)
+    if mode == "journal":
+        threshold = int(os.environ.get("TASK_JOURNAL_COMPACT_EVERY", 1000))
+        return JournalTaskStore(path, compact_threshold=threshold, **options)
+    if mode == "sharded":
+        shard_size = int(os.environ.get("TASK_SHARD_SIZE", 1000))
+        # Los segmentos no sirven deltas (ver ShardedTaskStore.changes)
+        del options["change_buffer"]
+        return ShardedTaskStore(path, shard_size=shard_size, **options)
+    if mode == "sqlite":
+        db_path = os.environ.get("TASKS_DB", os.path.splitext(path)[0] + ".db")
+        return SQLiteTaskStore(db_path, import_from=path, **options)
+    raise ValueError(f"Modo de almacenamiento desconocido: {mode}")
+
+
+class TaskStoreError(Exception):
+    """Error al leer el almacenamiento de tareas"""
+
+
+@contextlib.contextmanager
+def _file_lock(path, shared=False):
+    """Abre path y toma un lock entre procesos mientras dure el bloque"""
+    with open(path, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_SH if shared else fcntl.LOCK_EX)
+        try:
+            yield f
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def _stat_signature(path):
+    """(mtime, tamaño, inodo) de un archivo o None si no existe"""
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+@contextlib.contextmanager
+def _immediate(conn):
+    """Transacción BEGIN IMMEDIATE (o la ya abierta en conn)"""
+    if conn.in_transaction:
+        yield
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _read_tasks(path, attempts=3):
+    """
+    Lee un snapshot de tareas en cualquier formato; devuelve [] si no existe.
+    Si el contenido no es válido (por ejemplo, otra versión de la app lo está
+    escribiendo en el lugar) se reintenta y luego se lanza TaskStoreError:
+    devolver [] haría que la siguiente escritura borrara todas las tareas.
+    """
+    for attempt in range(attempts):
+        try:
+            with open(path, "rb") as f:
+                content = f.read()
+        except FileNotFoundError:
+            return []
+        if not content.strip():
+            return []
+        try:
+            return serializers.loads(content)
+        except ValueError as e:
+            if attempt == attempts - 1:
+                raise TaskStoreError(
+                    f"{path} no contiene un snapshot válido: {e}"
+                ) from e
+            time.sleep(0.05)
+
+
+def _etag(signature):
+    """Token corto y estable para una firma del almacenamiento"""
+    return hashlib.blake2b(repr(signature).encode("utf-8"), digest_size=8).hexdigest()
+
+
+def _open_or_none(path):
+    """Abre path en modo binario o devuelve None si no existe"""
+    try:
+        return open(path, "rb")
+    except FileNotFoundError:
+        return None
+
+
+def _iter_snapshot(f, path, use_mmap=False):
+    """Recorre en streaming un snapshot ya abierto y lo cierra al terminar"""
+    if f is None:
+        return
+    with f:
+        try:
+            yield from serializers.iter_open_file(f, use_mmap)
+        except ValueError as e:
+            raise TaskStoreError(f"{path} no contiene un snapshot válido: {e}") from e
+
+
+def _write_tasks_atomic(path, tasks, serializer):
+    """Escribe en un archivo temporal y lo publica con os.replace"""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(serializer.dumps(tasks))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def _unique_ids(tasks):
+    """Renumera ids repetidos (generados por versiones anteriores)"""
+    seen = set()
+    max_id = max((task["id"] for task in tasks), default=0)
+    result = []
+    for task in tasks:
+        if task["id"] in seen:
+            max_id += 1
+            task = dict(task, id=max_id)
+        seen.add(task["id"])
+        result.append(task)
+    return result
+
+
+def _walk(sorted_ids, after_id=None, descending=False):
+    """Recorre una lista ordenada de ids a partir del cursor after_id"""
+    if descending:
+        end = (
+            len(sorted_ids)
+            if after_id is None
+            else bisect.bisect_left(sorted_ids, after_id)
+        )
+        return (sorted_ids[i] for i in range(end - 1, -1, -1))
+    start = 0 if after_id is None else bisect.bisect_right(sorted_ids, after_id)
+    return (sorted_ids[i] for i in range(start, len(sorted_ids)))
+
+
+def _row_to_task(row):
+    """Convierte una fila de la tabla tasks en el dict de la tarea"""
+    task_id, text, completed, created_at = row
+    return {
+        "id": task_id,
+        "text": text,
+        "completed": bool(completed),
+        "created_at": created_at,
+    }
+
+
+def _replay(by_id, path, keep_deletes=False):
+    """
+    Aplica los registros de un log sobre by_id; devuelve cuántos leyó. Con
+    keep_deletes los borrados quedan como id -> None en lugar de quitarse.
+    """
+    count = 0
+    try:
+        f = open(path, "r", encoding="utf-8")
+    except FileNotFoundError:
+        return 0
+    with f:
+        for line in f:
+            try:
+                record = serializers.loads_record(line)
+            except ValueError:
+                # Línea incompleta al final del log tras una caída
+                break
+            if record["op"] == "put":
+                by_id[record["task"]["id"]] = record["task"]
+            elif record["op"] == "delete":
+                if keep_deletes:
+                    by_id[record["id"]] = None
+                else:
+                    by_id.pop(record["id"], None)
+            count += 1
+    return count
+
+
+def _merge_changes(tasks, changes):
+    """Aplica al vuelo los cambios de los logs sobre un recorrido del snapshot"""
+    for task in tasks:
+        if task["id"] in changes:
+            task = changes.pop(task["id"])
+            if task is None:
+                continue
+        yield task
+    for task in changes.values():
+        if task is not None:
+            yield task
@@ -1,9 +1,48 @@
-from locust import HttpUser, task, between
+from locust import HttpUser, task, between, events
 import json
+import os
 import random
+import re
+import time
+import uuid
 
+# LOCUST_CONDITIONAL=1 reenvía el último ETag en If-None-Match para medir
+# el ancho de banda y la CPU que ahorran las respuestas 304
+CONDITIONAL_REQUESTS = os.environ.get("LOCUST_CONDITIONAL", "0") == "1"
 
-class TaskListUser(HttpUser):
+# Segundos que SubscriberUser mantiene abierta cada suscripción SSE
+SSE_LISTEN_SECONDS = int(os.environ.get("LOCUST_SSE_SECONDS", 30))
+
+# Usuarios de escenarios específicos. No entran en la mezcla por defecto
+# (locust -f tests/locustfile.py sin clases, como en CI y run_tests.py):
+# se activan nombrándolos en LOCUST_SCENARIOS, separados por comas
+SCENARIO_USERS = set(filter(None, os.environ.get("LOCUST_SCENARIOS", "").split(",")))
+
+
+def scenario_only(name):
+    """Valor de abstract para un usuario de escenario: True si no se pidió"""
+    return name not in SCENARIO_USERS
+
+
+class ConditionalRequestsMixin:
+    """Guarda el ETag de cada ruta y lo envía en la siguiente petición"""
+
+    def conditional_headers(self, path):
+        """Cabecera If-None-Match para path (vacía si está desactivado)"""
+        etag = getattr(self, "etags", {}).get(path)
+        if not CONDITIONAL_REQUESTS or etag is None:
+            return {}
+        return {"If-None-Match": etag}
+
+    def remember_etag(self, path, response):
+        """Guarda el ETag de una respuesta 200"""
+        if response.status_code == 200 and "ETag" in response.headers:
+            if not hasattr(self, "etags"):
+                self.etags = {}
+            self.etags[path] = response.headers["ETag"]
+
+
+class TaskListUser(ConditionalRequestsMixin, HttpUser):
     """
     Clase de usuario para pruebas de carga en la aplicación de lista de tareas
     """
@@ -41,8 +80,14 @@ class TaskListUser(HttpUser):
         Tarea más común: ver la página principal
         Peso: 5 (se ejecutará 5 veces más frecuentemente que tareas con peso 1)
         """
-        with self.client.get("/", catch_response=True) as response:
-            if response.status_code == 200:
+        with self.client.get(
+            "/", headers=self.conditional_headers("/"), catch_response=True
+        ) as response:
+            if response.status_code == 304:
+                # Sin cambios desde la última vez: no se transfirió el HTML
+                response.success()
+            elif response.status_code == 200:
+                self.remember_etag("/", response)
                 # Verificar que la página contiene elementos esperados
                 if "Lista de Tareas" in response.text:
                     response.success()
@@ -77,8 +122,15 @@ class TaskListUser(HttpUser):
         Obtener tareas usando la API REST
         Peso: 2
         """
-        with self.client.get("/api/tasks", catch_response=True) as response:
-            if response.status_code == 200:
+        with self.client.get(
+            "/api/tasks",
+            headers=self.conditional_headers("/api/tasks"),
+            catch_response=True,
+        ) as response:
+            if response.status_code == 304:
+                response.success()
+            elif response.status_code == 200:
+                self.remember_etag("/api/tasks", response)
                 try:
                     tasks = response.json()
                     if isinstance(tasks, list):
@@ -191,7 +243,7 @@ class TaskListUser(HttpUser):
                 )
 
 
-class HeavyUser(HttpUser):
+class HeavyUser(ConditionalRequestsMixin, HttpUser):
     """
     Usuario que simula carga pesada para pruebas de estrés
     """
@@ -205,12 +257,16 @@ class HeavyUser(HttpUser):
     @task(10)
     def rapid_homepage_access(self):
         """Acceso rápido y frecuente a la página principal"""
-        self.client.get("/")
+        response = self.client.get("/", headers=self.conditional_headers("/"))
+        self.remember_etag("/", response)
 
     @task(5)
     def rapid_api_calls(self):
         """Llamadas rápidas a la API"""
-        self.client.get("/api/tasks")
+        response = self.client.get(
+            "/api/tasks", headers=self.conditional_headers("/api/tasks")
+        )
+        self.remember_etag("/api/tasks", response)
 
     @task(3)
     def rapid_task_creation(self):
@@ -285,6 +341,60 @@ class StressTestUser(HttpUser):
         self.client.get("/health")
 
 
+class BatchUser(HttpUser):
+    """
+    Usuario que crea tareas en lotes con POST /api/tasks/batch
+    (el mismo flujo que StressTestUser, con una petición por lote)
+    """
+
+    abstract = scenario_only("BatchUser")
+    wait_time = between(0.1, 1)
+
+    def on_start(self):
+        """Inicialización del usuario por lotes"""
+        self.batch_counter = 0
+
+    @task(3)
+    def create_batch(self):
+        """Crear varias tareas en una sola petición"""
+        self.batch_counter += 1
+        texts = [f"Batch task {self.batch_counter}-{i}" for i in range(3)]
+
+        with self.client.post(
+            "/api/tasks/batch", json=texts, catch_response=True
+        ) as response:
+            if response.status_code == 201:
+                try:
+                    created = response.json()
+                    if [task["text"] for task in created] == texts:
+                        response.success()
+                    else:
+                        response.failure("Batch response does not match request")
+                except (json.JSONDecodeError, KeyError, TypeError):
+                    response.failure("Invalid batch response")
+            else:
+                response.failure(f"Batch create failed: {response.status_code}")
+
+    @task(1)
+    def create_batch_ndjson(self):
+        """Crear un lote enviado como NDJSON"""
+        self.batch_counter += 1
+        body = "\n".join(
+            json.dumps({"text": f"NDJSON task {self.batch_counter}-{i}"})
+            for i in range(10)
+        )
+        self.client.post(
+            "/api/tasks/batch",
+            data=body,
+            headers={"Content-Type": "application/x-ndjson"},
+        )
+
+    @task(1)
+    def verify_state(self):
+        """Verificar el estado"""
+        self.client.get("/api/tasks", params={"limit": 10}, name="/api/tasks?limit")
+
+
 class APIOnlyUser(HttpUser):
     """
     Usuario que solo utiliza endpoints de API (sin interfaz web)
@@ -295,6 +405,9 @@ class APIOnlyUser(HttpUser):
     def on_start(self):
         """Configuración para usuario API-only"""
         self.task_ids = []
+        self.cursor = None
+        self.sync_version = None
+        self.feed_available = True
         self.api_tasks = [
             "API Task - Data Processing",
             "API Task - Batch Update",
@@ -323,29 +436,321 @@ class APIOnlyUser(HttpUser):
 
     @task(8)
     def api_list_tasks(self):
-        """Listar tareas via API"""
-        with self.client.get("/api/tasks", catch_response=True) as response:
+        """Listar tareas via API, una página por vez"""
+        params = {"limit": 5}
+        if self.cursor is not None:
+            params["after_id"] = self.cursor
+
+        with self.client.get(
+            "/api/tasks", params=params, name="/api/tasks?limit", catch_response=True
+        ) as response:
             if response.status_code == 200:
                 try:
-                    tasks = response.json()
-                    if isinstance(tasks, list):
-                        # Actualizar nuestra lista de IDs
-                        if tasks:
-                            self.task_ids = [task["id"] for task in tasks[-5:]]
+                    page = response.json()
+                    if isinstance(page.get("tasks"), list):
+                        # Actualizar nuestra lista de IDs y avanzar el cursor
+                        if page["tasks"]:
+                            self.task_ids = [task["id"] for task in page["tasks"]]
+                        self.cursor = page["next_cursor"]
                         response.success()
                     else:
-                        response.failure("API response is not a list")
-                except json.JSONDecodeError:
+                        response.failure("API response has no task page")
+                except (json.JSONDecodeError, AttributeError):
                     response.failure("Invalid JSON response")
             else:
                 response.failure(f"API list failed: {response.status_code}")
 
+    @task(2)
+    def api_complete_task(self):
+        """Completar una tarea con PATCH, sin redirección ni render"""
+        if not self.task_ids:
+            return
+        task_id = random.choice(self.task_ids)
+        with self.client.patch(
+            f"/api/tasks/{task_id}",
+            json={"completed": True},
+            name="/api/tasks/[id] (PATCH)",
+            catch_response=True,
+        ) as response:
+            # 404: otro usuario la borró mientras tanto
+            if response.status_code in (200, 404):
+                response.success()
+            else:
+                response.failure(f"API patch failed: {response.status_code}")
+
+    @task(1)
+    def api_delete_task(self):
+        """Eliminar una tarea con DELETE, sin redirección ni render"""
+        if not self.task_ids:
+            return
+        task_id = self.task_ids.pop()
+        with self.client.delete(
+            f"/api/tasks/{task_id}",
+            name="/api/tasks/[id] (DELETE)",
+            catch_response=True,
+        ) as response:
+            if response.status_code in (204, 404):
+                response.success()
+            else:
+                response.failure(f"API delete failed: {response.status_code}")
+
+    @task(4)
+    def api_poll_changes(self):
+        """Sincronizar solo los cambios desde la última versión vista"""
+        if not self.feed_available:
+            return
+        params = {"since": self.sync_version} if self.sync_version else {}
+        with self.client.get(
+            "/api/tasks/changes",
+            params=params,
+            name="/api/tasks/changes",
+            catch_response=True,
+        ) as response:
+            if response.status_code == 501:
+                # Varios workers sin SQLite: el feed no se ofrece
+                self.feed_available = False
+                response.success()
+                return
+            if response.status_code != 200:
+                response.failure(f"API changes failed: {response.status_code}")
+                return
+            try:
+                feed = response.json()
+                self.sync_version = feed["version"]
+                response.success()
+            except (json.JSONDecodeError, KeyError):
+                response.failure("Invalid changes response")
+                return
+        if feed["resync"]:
+            # Versión fuera del buffer: se vuelve a leer la lista completa
+            self.client.get("/api/tasks", name="/api/tasks (resync)")
+
+    @task(2)
+    def api_task_stats(self):
+        """Totales para un tablero, sin leer la lista de tareas"""
+        with self.client.get(
+            "/api/tasks/stats", name="/api/tasks/stats", catch_response=True
+        ) as response:
+            try:
+                stats = response.json()
+                if stats["total"] == stats["completed"] + stats["pending"]:
+                    response.success()
+                else:
+                    response.failure("Inconsistent task stats")
+            except (json.JSONDecodeError, KeyError):
+                response.failure(f"API stats failed: {response.status_code}")
+
     @task(1)
     def api_health_check(self):
         """Health check via API"""
         self.client.get("/health")
 
 
+# Recursos con huella enlazados desde el HTML (CSS y JS)
+ASSET_URL_PATTERN = re.compile(r'(?:href|src)="(/assets/[^"]+)"')
+
+
+class BrowserCacheUser(HttpUser):
+    """
+    Usuario que imita la caché de un navegador: descarga el CSS y el JS de
+    la página solo si su URL con huella no está ya en su caché. Verifica que
+    los recursos se sirven como immutable, de modo que en las visitas
+    repetidas solo se pide el documento HTML.
+    """
+
+    abstract = scenario_only("BrowserCacheUser")
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        """Caché vacía, como un navegador nuevo"""
+        self.cached_assets = set()
+
+    @task
+    def view_homepage(self):
+        """Ver la página principal y descargar solo los recursos nuevos"""
+        response = self.client.get("/")
+        if response.status_code != 200:
+            return
+        for url in ASSET_URL_PATTERN.findall(response.text):
+            if url in self.cached_assets:
+                continue
+            with self.client.get(
+                url, name="/assets/[fingerprint]", catch_response=True
+            ) as asset:
+                if asset.status_code != 200:
+                    asset.failure(f"Asset returned status code: {asset.status_code}")
+                elif "immutable" not in asset.headers.get("Cache-Control", ""):
+                    asset.failure("Asset is not served as immutable")
+                else:
+                    self.cached_assets.add(url)
+                    asset.success()
+
+
+class SubscriberUser(HttpUser):
+    """
+    Usuario que recibe los cambios por Server-Sent Events (/api/tasks/events)
+    en lugar de consultar / o /api/tasks periódicamente. Para comparar la
+    carga del servidor, correr la misma cantidad de usuarios que con
+    TaskListUser o APIOnlyUser, junto a usuarios que generen escrituras.
+    Con miles de suscriptores, iniciar la app con GEVENT=1 python app.py.
+    """
+
+    abstract = scenario_only("SubscriberUser")
+    wait_time = between(1, 3)
+
+    def on_start(self):
+        """Carga inicial de la lista; los eventos traen solo los cambios"""
+        self.last_event_id = None
+        self.feed_available = True
+        self.client.get("/api/tasks")
+
+    @task
+    def subscribe(self):
+        """Escuchar eventos durante SSE_LISTEN_SECONDS y volver a conectar"""
+        if not self.feed_available:
+            return
+        headers = {"Accept": "text/event-stream"}
+        if self.last_event_id:
+            # Reanudar sin perder los cambios ocurridos entre conexiones
+            headers["Last-Event-ID"] = self.last_event_id
+
+        deadline = time.monotonic() + SSE_LISTEN_SECONDS
+        with self.client.get(
+            "/api/tasks/events",
+            headers=headers,
+            stream=True,
+            catch_response=True,
+            timeout=SSE_LISTEN_SECONDS + 30,
+        ) as response:
+            if response.status_code == 501:
+                # Varios workers sin SQLite: el feed no se ofrece
+                response.failure("SSE needs WORKERS=1 or TASK_STORE=sqlite")
+                self.feed_available = False
+                return
+            if response.status_code != 200:
+                response.failure(f"SSE subscribe failed: {response.status_code}")
+                return
+            response.success()
+
+            event, data = None, ""
+            for line in response.iter_lines(decode_unicode=True):
+                if line.startswith("id: "):
+                    self.last_event_id = line[4:]
+                elif line.startswith("event: "):
+                    event = line[7:]
+                elif line.startswith("data: "):
+                    data = line[6:]
+                elif not line and event:
+                    # Evento completo: se cuenta en las estadísticas de Locust
+                    self.environment.events.request.fire(
+                        request_type="SSE",
+                        name=f"event: {event}",
+                        response_time=0,
+                        response_length=len(data),
+                        exception=None,
+                        context={},
+                    )
+                    if event == "resync":
+                        self.client.get("/api/tasks", name="/api/tasks (resync)")
+                    event, data = None, ""
+                if time.monotonic() >= deadline:
+                    break
+
+
+# Estado esperado de las tareas creadas por ConsistencyUser: id -> (texto, completada)
+expected_tasks = {}
+
+
+class ConsistencyUser(HttpUser):
+    """
+    Usuario que verifica que no se pierden escrituras con varios workers
+    (WORKERS=8 python app.py, que arranca gunicorn con 8 procesos). Cada usuario crea tareas con texto único y las
+    alterna; al terminar la prueba se compara el estado esperado con el que
+    devuelve la API.
+    """
+
+    abstract = scenario_only("ConsistencyUser")
+    wait_time = between(0.05, 0.2)
+
+    def on_start(self):
+        """Identificador único del usuario para sus textos"""
+        self.user_tag = uuid.uuid4().hex[:8]
+        self.own_ids = []
+
+    @task(3)
+    def create_task(self):
+        """Crear tarea con texto único"""
+        text = f"Consistencia {self.user_tag} {len(self.own_ids)}"
+        with self.client.post(
+            "/api/tasks", json={"text": text}, catch_response=True
+        ) as response:
+            if response.status_code == 201:
+                task_id = response.json()["id"]
+                if task_id in expected_tasks:
+                    response.failure(f"Id duplicado: {task_id}")
+                    return
+                expected_tasks[task_id] = (text, False)
+                self.own_ids.append(task_id)
+                response.success()
+            else:
+                response.failure(f"API create failed: {response.status_code}")
+
+    @task(2)
+    def toggle_own_task(self):
+        """Alternar una tarea propia (nadie más la modifica)"""
+        if not self.own_ids:
+            return
+        task_id = random.choice(self.own_ids)
+        # Sin seguir la redirección: el 302 es la confirmación del toggle
+        with self.client.get(
+            f"/toggle/{task_id}",
+            name="/toggle/[id]",
+            allow_redirects=False,
+            catch_response=True,
+        ) as response:
+            if response.status_code == 302:
+                text, completed = expected_tasks[task_id]
+                expected_tasks[task_id] = (text, not completed)
+                response.success()
+            else:
+                # No se sabe si el toggle se aplicó: la tarea deja de verificarse
+                self.own_ids.remove(task_id)
+                expected_tasks.pop(task_id, None)
+                response.failure(f"Toggle returned status code: {response.status_code}")
+
+
+@events.test_stop.add_listener
+def verify_no_lost_updates(environment, **kwargs):
+    """Compara el estado esperado de ConsistencyUser con el de la API"""
+    if not expected_tasks:
+        return
+    running = [user_class.__name__ for user_class in environment.user_classes]
+    if running != ["ConsistencyUser"]:
+        # Los demás usuarios también alternan y borran tareas: no se puede
+        # distinguir una escritura perdida de una modificación ajena
+        print(f"⚠️  Verificación de consistencia omitida: corren también {running}")
+        return
+
+    import requests
+
+    tasks = requests.get(f"{environment.host}/api/tasks", timeout=30).json()
+    actual = {task["id"]: (task["text"], task["completed"]) for task in tasks}
+    lost = [
+        task_id
+        for task_id, state in expected_tasks.items()
+        if actual.get(task_id) != state
+    ]
+
+    print("=" * 60)
+    print(f"🔍 Verificación de consistencia: {len(expected_tasks)} tareas esperadas")
+    if lost:
+        print(f"❌ Escrituras perdidas o incorrectas: {len(lost)} (ids: {lost[:10]})")
+        environment.process_exit_code = 1
+    else:
+        print("✅ Cero escrituras perdidas")
+    print("=" * 60)
+
+
 if __name__ == "__main__":
     # Este archivo puede ejecutarse directamente para pruebas rápidas
     import os
@@ -366,6 +771,13 @@ if __name__ == "__main__":
     print("- MobileUser: Usuario simulando dispositivo móvil")
     print("- StressTestUser: Usuario para pruebas de estrés")
     print("- APIOnlyUser: Usuario que solo usa endpoints API")
+    print("- BatchUser: Usuario que crea tareas en lotes")
+    print("- ConsistencyUser: Verifica que no se pierden escrituras")
+    print("- SubscriberUser: Recibe los cambios por SSE en lugar de consultar")
+    print("- BrowserCacheUser: Descarga CSS/JS solo la primera vez, como un navegador")
+    print(
+        "(BatchUser, BrowserCacheUser, SubscriberUser y ConsistencyUser solo corren si se nombran en LOCUST_SCENARIOS)"
+    )
     print("\n💡 Ejemplos de uso:")
     print("# Usuario normal (10 usuarios, 2 por segundo)")
     print(
@@ -375,9 +787,36 @@ if __name__ == "__main__":
     print(
         "locust -f tests/locustfile.py StressTestUser --host=http://localhost:5000 --users 50 --spawn-rate 5 --run-time 300s --headless"
     )
+    print("\n# Peticiones condicionales (If-None-Match) para medir las respuestas 304")
+    print(
+        "LOCUST_CONDITIONAL=1 locust -f tests/locustfile.py TaskListUser,HeavyUser --host=http://localhost:5000"
+    )
+    print("\n# Creación en lotes frente a peticiones individuales")
+    print(
+        "LOCUST_SCENARIOS=BatchUser locust -f tests/locustfile.py BatchUser,StressTestUser --host=http://localhost:5000 --users 20 --spawn-rate 5"
+    )
+    print(
+        "\n# Suscriptores SSE frente a consultas periódicas (iniciar antes: GEVENT=1 python app.py)"
+    )
+    print(
+        "LOCUST_SCENARIOS=SubscriberUser locust -f tests/locustfile.py SubscriberUser,StressTestUser --host=http://localhost:5000 --users 50 --spawn-rate 10"
+    )
+    print(
+        "locust -f tests/locustfile.py TaskListUser,StressTestUser --host=http://localhost:5000 --users 50 --spawn-rate 10"
+    )
+    print("\n# Visitas repetidas con caché de navegador (solo se pide el HTML)")
+    print(
+        "LOCUST_SCENARIOS=BrowserCacheUser locust -f tests/locustfile.py BrowserCacheUser --host=http://localhost:5000 --users 20 --spawn-rate 5"
+    )
     print("\n# Múltiples tipos de usuarios")
     print(
         "locust -f tests/locustfile.py TaskListUser,MobileUser --host=http://localhost:5000"
     )
+    print(
+        "\n# Consistencia con 8 workers gunicorn (iniciar antes: WORKERS=8 python app.py)"
+    )
+    print(
+        "LOCUST_SCENARIOS=ConsistencyUser locust -f tests/locustfile.py ConsistencyUser --host=http://localhost:5000 --users 50 --spawn-rate 10 --run-time 60s --headless"
+    )
     print("\n🌐 Interfaz web: http://localhost:8089")
     print("=" * 60)
@@ -0,0 +1,1573 @@
+import gzip
+import importlib.util
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+import tracemalloc
+import urllib.error
+import urllib.request
+
+import pytest
+from jinja2 import FileSystemBytecodeCache
+
+# Agregar el directorio del proyecto al path para importar la app
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as app_module  # noqa: E402
+from assets import AssetFingerprints  # noqa: E402
+import serializers  # noqa: E402
+from response_cache import CompressedStream, VersionedCache  # noqa: E402
+from task_store import (  # noqa: E402
+    IdSequence,
+    JSONTaskStore,
+    JournalTaskStore,
+    ShardedTaskStore,
+    SortedIndex,
+    SQLiteTaskStore,
+    TaskStoreError,
+    create_store,
+)
+
+
+def write_tasks(path, tasks):
+    """Escribe un archivo de tareas como lo haría otro proceso"""
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(tasks, f)
+
+
+def make_task(task_id, text="Tarea", completed=False):
+    """Construye una tarea con el formato del archivo"""
+    return {
+        "id": task_id,
+        "text": text,
+        "completed": completed,
+        "created_at": "2025-06-11T15:27:40.222501",
+    }
+
+
+@pytest.fixture
+def tasks_file(tmp_path):
+    """Ruta a un archivo de tareas temporal"""
+    return str(tmp_path / "tasks.json")
+
+
+@pytest.fixture(params=["json", "journal", "sharded", "sqlite"])
+def store(request, tasks_file, tmp_path, monkeypatch):
+    """Repositorio aislado de cada backend disponible"""
+    monkeypatch.setenv("TASKS_DB", str(tmp_path / "tasks.db"))
+    return create_store(tasks_file, request.param)
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    """Cliente de pruebas de Flask con un repositorio aislado"""
+    monkeypatch.setattr(app_module, "store", store)
+    app_module.invalidate_response_caches()
+    app_module.app.config["TESTING"] = True
+    with app_module.app.test_client() as client:
+        yield client
+
+
+class TestTaskStoreCache:
+    """Pruebas de la caché en memoria del repositorio"""
+
+    def test_reads_are_served_from_memory(self, tasks_file):
+        write_tasks(tasks_file, [make_task(1)])
+        store = JSONTaskStore(tasks_file)
+
+        store.all()
+        store.all()
+        store.all()
+
+        stats = store.stats()
+        assert stats["misses"] == 1
+        assert stats["hits"] == 2
+
+    def test_reloads_when_file_changes_externally(self, tasks_file):
+        write_tasks(tasks_file, [make_task(1)])
+        store = JSONTaskStore(tasks_file)
+        assert len(store.all()) == 1
+
+        write_tasks(tasks_file, [make_task(1), make_task(2, "Externa")])
+        os.utime(tasks_file, ns=(0, 0))
+
+        assert [t["text"] for t in store.all()] == ["Tarea", "Externa"]
+        assert store.stats()["misses"] == 2
+
+    def test_writes_update_cache_without_reload(self, tasks_file):
+        store = JSONTaskStore(tasks_file)
+        store.add({"text": "Nueva", "completed": False, "created_at": "x"})
+        store.all()
+
+        assert store.stats()["misses"] == 1
+        with open(tasks_file, encoding="utf-8") as f:
+            assert json.load(f)[0]["text"] == "Nueva"
+
+    def test_toggle_does_not_mutate_previous_snapshots(self, tasks_file):
+        write_tasks(tasks_file, [make_task(1)])
+        store = JSONTaskStore(tasks_file)
+        snapshot = store.all()
+
+        store.toggle(1)
+
+        assert snapshot[0]["completed"] is False
+        assert store.all()[0]["completed"] is True
+
+
+class TestTaskIndex:
+    """Pruebas del índice por id y del orden de visualización"""
+
+    def test_toggle_and_delete_keep_display_order(self, store):
+        for text in ("A", "B", "C", "D"):
+            store.add({"text": text, "completed": False, "created_at": "x"})
+
+        store.toggle(2)
+        store.delete(3)
+
+        assert [(t["text"], t["completed"]) for t in store.all()] == [
+            ("A", False),
+            ("B", True),
+            ("D", False),
+        ]
+
+    def test_duplicate_ids_are_renumbered_on_load(self, tasks_file):
+        write_tasks(
+            tasks_file, [make_task(1, "A"), make_task(2, "B"), make_task(2, "C")]
+        )
+        store = JSONTaskStore(tasks_file)
+
+        assert [(t["id"], t["text"]) for t in store.all()] == [
+            (1, "A"),
+            (2, "B"),
+            (3, "C"),
+        ]
+        store.delete(2)
+        assert [t["text"] for t in store.all()] == ["A", "C"]
+
+
+class TestIdSequence:
+    """Pruebas de la secuencia persistente de ids"""
+
+    def test_ids_are_not_reused_after_delete(self, store):
+        first = store.add({"text": "A", "completed": False, "created_at": "x"})
+        second = store.add({"text": "B", "completed": False, "created_at": "x"})
+        store.delete(second["id"])
+
+        third = store.add({"text": "C", "completed": False, "created_at": "x"})
+
+        assert third["id"] > second["id"] > first["id"]
+
+    def test_sequence_survives_restart(self, tasks_file):
+        store = JSONTaskStore(tasks_file)
+        task = store.add({"text": "A", "completed": False, "created_at": "x"})
+        store.delete(task["id"])
+
+        reopened = JSONTaskStore(tasks_file)
+        assert (
+            reopened.add({"text": "B", "completed": False, "created_at": "x"})["id"]
+            > task["id"]
+        )
+
+    def test_workers_get_disjoint_blocks(self, tasks_file):
+        worker_a = JSONTaskStore(tasks_file, id_block_size=10)
+        worker_b = JSONTaskStore(tasks_file, id_block_size=10)
+
+        ids_a = [worker_a._allocate_id() for _ in range(15)]
+        ids_b = [worker_b._allocate_id() for _ in range(15)]
+
+        assert not set(ids_a) & set(ids_b)
+        assert ids_a == sorted(ids_a) and ids_b == sorted(ids_b)
+
+    def test_alternating_workers_keep_their_blocks(self, tasks_file):
+        worker_a = JSONTaskStore(tasks_file, id_block_size=10)
+        worker_b = JSONTaskStore(tasks_file, id_block_size=10)
+
+        ids = []
+        for i in range(10):
+            worker = worker_a if i % 2 == 0 else worker_b
+            ids.append(
+                worker.add({"text": f"T{i}", "completed": False, "created_at": "x"})[
+                    "id"
+                ]
+            )
+
+        # Un bloque por worker: ver las altas del otro no descarta el propio
+        assert ids[0::2] == [1, 2, 3, 4, 5] and ids[1::2] == [11, 12, 13, 14, 15]
+        with open(tasks_file + ".seq") as f:
+            assert f.read() == "20"
+
+    def test_replace_moves_the_sequence_past_imported_ids(self, store):
+        store.replace([make_task(500)])
+        assert (
+            store.add({"text": "A", "completed": False, "created_at": "x"})["id"] > 500
+        )
+
+    def test_concurrent_allocation_is_unique(self):
+        reserved = {"last": 0}
+
+        def reserve(count, floor):
+            start = max(reserved["last"], floor) + 1
+            reserved["last"] = start + count - 1
+            return start
+
+        sequence = IdSequence(reserve, block_size=7)
+        results = []
+
+        def worker():
+            results.extend(sequence.next_id() for _ in range(200))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(results)) == 1600
+
+
+def _add_from_worker(mode, tasks_file, worker, count):
+    """Agrega y completa count tareas desde un proceso independiente"""
+    store = create_store(tasks_file, mode)
+    for i in range(count):
+        task = store.add(
+            {"text": f"w{worker}-{i}", "completed": False, "created_at": "x"}
+        )
+        store.toggle(task["id"])
+
+
+class TestMultiProcess:
+    """Pruebas de escrituras concurrentes desde varios procesos"""
+
+    @pytest.mark.skipif(os.name == "nt", reason="Requiere fork y fcntl")
+    @pytest.mark.parametrize("mode", ["json", "journal", "sharded", "sqlite"])
+    def test_no_lost_updates_with_concurrent_workers(
+        self, mode, tasks_file, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("TASKS_DB", str(tmp_path / "tasks.db"))
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(
+                target=_add_from_worker, args=(mode, tasks_file, worker, 25)
+            )
+            for worker in range(8)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(60)
+            assert process.exitcode == 0
+
+        tasks = create_store(tasks_file, mode).all()
+        assert len(tasks) == 200
+        assert len({t["id"] for t in tasks}) == 200
+        assert all(t["completed"] for t in tasks)
+
+    def test_corrupt_file_raises_instead_of_returning_empty(self, tasks_file):
+        with open(tasks_file, "w", encoding="utf-8") as f:
+            f.write('[{"id": 1, "text": "trunc')
+        store = JSONTaskStore(tasks_file)
+
+        with pytest.raises(TaskStoreError):
+            store.all()
+
+    def test_writes_never_leave_a_partial_file(self, tasks_file):
+        store = JSONTaskStore(tasks_file)
+        store.add({"text": "A", "completed": False, "created_at": "x"})
+
+        leftovers = [
+            name
+            for name in os.listdir(os.path.dirname(tasks_file))
+            if name.endswith(".tmp")
+        ]
+        assert leftovers == []
+
+
+class TestGroupCommit:
+    """Pruebas de la agrupación de escrituras concurrentes"""
+
+    @pytest.mark.parametrize("mode", ["json", "journal", "sqlite"])
+    def test_concurrent_writes_are_batched(
+        self, mode, tasks_file, tmp_path, monkeypatch
+    ):
+        monkeypatch.setenv("TASKS_DB", str(tmp_path / "tasks.db"))
+        monkeypatch.setenv("TASK_GROUP_COMMIT_MS", "5")
+        store = create_store(tasks_file, mode)
+
+        def worker(n):
+            for i in range(10):
+                task = store.add(
+                    {"text": f"{n}-{i}", "completed": False, "created_at": "x"}
+                )
+                store.toggle(task["id"])
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        stats = store.stats()["group_commit"]
+        assert stats["operations"] == 160
+        assert stats["batches"] < stats["operations"]
+
+        tasks = create_store(tasks_file, mode).all()
+        assert len(tasks) == 80
+        assert all(t["completed"] for t in tasks)
+
+    def test_nested_mutation_does_not_wait_for_the_batch(self, tasks_file):
+        store = JSONTaskStore(tasks_file, group_commit_ms=5)
+        with store._transaction():
+            store.add({"text": "A", "completed": False, "created_at": "x"})
+
+        assert [t["text"] for t in JSONTaskStore(tasks_file).all()] == ["A"]
+
+
+class TestSerializers:
+    """Pruebas de los formatos de serialización del snapshot"""
+
+    def test_default_snapshot_is_compact_json(self, tasks_file, monkeypatch):
+        monkeypatch.delenv("TASK_FORMAT", raising=False)
+        store = JSONTaskStore(tasks_file)
+        store.add({"text": "Ñandú", "completed": False, "created_at": "x"})
+
+        with open(tasks_file, encoding="utf-8") as f:
+            content = f.read()
+        assert "\n" not in content and ": " not in content
+        assert json.loads(content)[0]["text"] == "Ñandú"
+
+    @pytest.mark.parametrize("name", ["json", "pretty", "msgpack"])
+    def test_round_trip_and_format_detection(self, name, tasks_file):
+        if name == "msgpack" and serializers.msgpack is None:
+            pytest.skip("msgpack no está instalado")
+        store = JSONTaskStore(tasks_file, serializer=serializers.get_serializer(name))
+        store.add({"text": "A", "completed": False, "created_at": "x"})
+
+        # Se lee sin indicar el formato: se detecta por el contenido
+        assert [t["text"] for t in JSONTaskStore(tasks_file).all()] == ["A"]
+
+    def test_convert_file_between_formats(self, tasks_file, tmp_path):
+        write_tasks(tasks_file, [make_task(1), make_task(2, completed=True)])
+        target = str(tmp_path / "pretty.json")
+
+        count, name = serializers.convert_file(tasks_file, target, "pretty")
+
+        assert (count, name) == (2, "pretty")
+        with open(target, encoding="utf-8") as f:
+            assert f.read().startswith("[\n")
+        assert [t["completed"] for t in JSONTaskStore(target).all()] == [False, True]
+
+
+class TestBatchWrites:
+    """Pruebas de la creación de tareas en lote"""
+
+    def test_add_many_uses_one_write(self, store, monkeypatch):
+        store.all()
+        writes = []
+        backend = store._store(0, create=True) if hasattr(store, "_store") else store
+        original = backend._persist
+        monkeypatch.setattr(
+            backend,
+            "_persist",
+            lambda records: writes.append(records) or original(records),
+        )
+
+        created = store.add_many(
+            [
+                {"text": f"T{i}", "completed": False, "created_at": "x"}
+                for i in range(20)
+            ]
+        )
+
+        assert [t["id"] for t in created] == list(range(1, 21))
+        assert len(writes) == 1 and len(writes[0]) == 20
+        assert [t["text"] for t in type(store)(store.path).all()] == [
+            f"T{i}" for i in range(20)
+        ]
+
+
+class TestBulkMutations:
+    """Pruebas de las mutaciones en lote"""
+
+    def test_bulk_across_segments_keeps_request_order(self, tasks_file):
+        store = ShardedTaskStore(tasks_file, shard_size=5)
+        store.add_many(
+            [
+                {"text": f"T{i}", "completed": False, "created_at": "x"}
+                for i in range(12)
+            ]
+        )
+
+        results = store.bulk("toggle", [12, 2, 7, 2, 40])
+
+        assert [r["status"] for r in results] == ["updated"] * 4 + ["not_found"]
+        assert [r["task"]["completed"] for r in results[:4]] == [
+            True,
+            True,
+            True,
+            False,
+        ]
+        assert store.bulk("uncomplete", [12])[0]["task"]["completed"] is False
+        with pytest.raises(ValueError):
+            store.bulk("archive", [1])
+
+
+class TestPagination:
+    """Pruebas de la paginación por cursor"""
+
+    def test_pages_skip_deleted_tasks(self, store):
+        for i in range(10):
+            store.add({"text": f"T{i}", "completed": False, "created_at": "x"})
+        for task_id in (3, 4, 8):
+            store.delete(task_id)
+
+        first, more = store.page(3)
+        assert [t["id"] for t in first] == [1, 2, 5] and more
+        second, more = store.page(3, after_id=5)
+        assert [t["id"] for t in second] == [6, 7, 9] and more
+        last, more = store.page(3, after_id=9)
+        assert [t["id"] for t in last] == [10] and not more
+
+        previous, more = store.page(3, before_id=9)
+        assert [t["id"] for t in previous] == [5, 6, 7] and more
+
+    def test_sharded_pages_cross_segments(self, tasks_file):
+        store = ShardedTaskStore(tasks_file, shard_size=4)
+        for i in range(10):
+            store.add({"text": f"T{i}", "completed": False, "created_at": "x"})
+
+        tasks, more = store.page(5, after_id=2)
+        assert [t["id"] for t in tasks] == [3, 4, 5, 6, 7] and more
+        tasks, more = store.page(5, before_id=7)
+        assert [t["id"] for t in tasks] == [2, 3, 4, 5, 6] and more
+        tasks, more = store.page(5, before_id=4)
+        assert [t["id"] for t in tasks] == [1, 2, 3] and not more
+
+
+class TestQueryIndexes:
+    """Pruebas de los filtros respaldados por índices secundarios"""
+
+    def seed(self, store):
+        for day in range(1, 11):
+            task = store.add(
+                {
+                    "text": f"D{day}",
+                    "completed": False,
+                    "created_at": f"2025-06-{day:02d}T10:00:00",
+                }
+            )
+            if day % 3 == 0:
+                store.toggle(task["id"])
+
+    def test_counts_follow_mutations(self, store):
+        self.seed(store)
+        assert store.counts() == {"total": 10, "completed": 3}
+        store.delete(6)
+        store.toggle(1)
+        assert store.counts() == {"total": 9, "completed": 3}
+        assert type(store)(store.path).counts() == store.counts()
+
+    def test_filters_by_completed_and_date_range(self, store):
+        self.seed(store)
+        store.delete(6)
+
+        done, _ = store.query(completed=True)
+        assert [t["text"] for t in done] == ["D3", "D9"]
+        window, _ = store.query(
+            created_after="2025-06-02T10:00:00", created_before="2025-06-08"
+        )
+        assert [t["text"] for t in window] == ["D3", "D4", "D5", "D7"]
+        pending, _ = store.query(completed=False, created_after="2025-06-05")
+        assert [t["text"] for t in pending] == ["D5", "D7", "D8", "D10"]
+
+    def test_sorting_and_limit(self, store):
+        self.seed(store)
+        store.add(
+            {"text": "Antigua", "completed": False, "created_at": "2024-01-01T00:00:00"}
+        )
+
+        newest, more = store.query(limit=3, sort="created_at", descending=True)
+        assert [t["text"] for t in newest] == ["D10", "D9", "D8"] and more
+        oldest, _ = store.query(limit=1, sort="created_at")
+        assert oldest[0]["text"] == "Antigua"
+        by_id, _ = store.query(limit=2, after_id=9, descending=True, completed=False)
+        assert [t["id"] for t in by_id] == [8, 7]
+
+    def test_indexes_follow_mutations_after_reload(self, store):
+        self.seed(store)
+        store.toggle(1)
+        store.delete(3)
+
+        reloaded = type(store)(store.path)
+        assert [t["id"] for t in reloaded.query(completed=True)[0]] == [1, 6, 9]
+
+    def test_pending_ids_follow_toggles(self, tasks_file):
+        store = JSONTaskStore(tasks_file)
+        self.seed(store)
+        store.toggle(1)
+        store.toggle(3)
+        store.delete(2)
+
+        # Los pendientes se paginan con su propio índice, sin filtrar
+        assert list(store._pending_ids.between()) == [3, 4, 5, 7, 8, 10]
+        page, more = store.query(limit=2, after_id=4, completed=False)
+        assert [t["id"] for t in page] == [5, 7] and more
+
+    def test_deleted_ids_leave_the_order_index(self, tasks_file):
+        store = JSONTaskStore(tasks_file)
+        store.add_many(
+            [
+                {"text": f"T{i}", "completed": False, "created_at": "x"}
+                for i in range(10)
+            ]
+        )
+        store.bulk("delete", list(range(1, 9)))
+
+        # La paginación no recorre los ids borrados
+        assert list(store._order.between()) == [9, 10]
+        assert [t["id"] for t in store.page(1)[0]] == [9]
+
+    def test_sorted_index_ranges_across_blocks(self, monkeypatch):
+        monkeypatch.setattr(SortedIndex, "LOAD", 2)
+        index = SortedIndex(range(0, 20, 2))
+        for value in (5, 7, 1, 25, 7):
+            index.add(value)
+        for value in (0, 2, 4, 6, 99):
+            index.discard(value)
+
+        assert list(index.between()) == [1, 5, 7, 8, 10, 12, 14, 16, 18, 25]
+        assert len(index) == 10
+        assert list(index.between(5, 14)) == [7, 8, 10, 12]
+        assert list(index.between(5, 14, descending=True)) == [12, 10, 8, 7]
+        assert list(index.walk(16)) == [18, 25]
+        assert list(index.walk(5, descending=True)) == [1]
+
+
+class TestVersioning:
+    """Pruebas de la versión de los datos y del ETag"""
+
+    def test_etag_is_shared_between_processes(self, store):
+        other = type(store)(store.path)
+        assert store.etag() == other.etag()
+
+        before = store.version()
+        other.add({"text": "A", "completed": False, "created_at": "x"})
+
+        assert store.etag() == other.etag()
+        assert store.version() > before
+        assert [t["text"] for t in store.all()] == ["A"]
+
+    def test_etag_changes_on_every_write(self, store):
+        etags = {store.etag()}
+        task = store.add({"text": "A", "completed": False, "created_at": "x"})
+        etags.add(store.etag())
+        store.toggle(task["id"])
+        etags.add(store.etag())
+        store.delete(task["id"])
+        etags.add(store.etag())
+        assert len(etags) == 4
+
+
+class TestChangeFeed:
+    """Pruebas del buffer de cambios recientes de changes()"""
+
+    def test_returns_latest_state_of_each_changed_task(self, store):
+        if isinstance(store, ShardedTaskStore):
+            pytest.skip("ShardedTaskStore siempre pide resincronizar")
+        for text in ("A", "B", "C"):
+            store.add({"text": text, "completed": False, "created_at": "x"})
+        since = store.version()
+
+        store.toggle(1)
+        store.delete(2)
+        store.add({"text": "D", "completed": False, "created_at": "x"})
+        store.toggle(1)
+
+        version, changes = store.changes(since)
+        assert version == store.version()
+        assert [(c["id"], c["task"] and c["task"]["completed"]) for c in changes] == [
+            (2, None),
+            (4, False),
+            (1, False),
+        ]
+        assert store.changes(version) == (version, [])
+
+    def test_versions_older_than_the_buffer_require_resync(self, tasks_file):
+        store = JSONTaskStore(tasks_file, change_buffer=3)
+        since = store.version()
+        store.add_many(
+            [{"text": t, "completed": False, "created_at": "x"} for t in "AB"]
+        )
+        store.toggle(1)
+        assert store.changes(since)[1] is not None
+
+        store.toggle(2)
+        assert store.changes(since)[1] is None
+        assert store.changes(store.version() + 1)[1] is None
+
+    def test_external_changes_require_resync(self, store):
+        if store.shared_changes:
+            pytest.skip("el feed de SQLite incluye los cambios de otros procesos")
+        since = store.version()
+        other = type(store)(store.path)
+        other.add({"text": "A", "completed": False, "created_at": "x"})
+
+        assert store.changes(since)[1] is None
+        version, changes = store.changes(store.version())
+        if not isinstance(store, ShardedTaskStore):
+            assert changes == []
+
+    def test_sqlite_feed_is_shared_between_processes(self, tmp_path):
+        path = str(tmp_path / "tasks.db")
+        store, other = SQLiteTaskStore(path), SQLiteTaskStore(path)
+        since = store.version()
+        other.add_many(
+            [{"text": t, "completed": False, "created_at": "x"} for t in "AB"]
+        )
+        other.toggle(1)
+        other.delete(2)
+
+        assert store.epoch() == other.epoch()
+        version, changes = store.changes(since)
+        assert version == store.version() == other.version()
+        assert [(c["id"], c["task"] and c["task"]["completed"]) for c in changes] == [
+            (1, True),
+            (2, None),
+        ]
+
+    def test_sqlite_feed_keeps_the_last_change_buffer_entries(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), change_buffer=3)
+        since = store.version()
+        store.add_many(
+            [{"text": t, "completed": False, "created_at": "x"} for t in "AB"]
+        )
+        store.toggle(1)
+        assert store.changes(since)[1] is not None
+
+        store.toggle(2)
+        assert store.changes(since)[1] is None
+        assert store.changes(store.version() + 1)[1] is None
+        store.replace([])
+        assert store.changes(store.version() - 1)[1] is None
+        assert store.changes(store.version()) == (store.version(), [])
+
+
+class TestVersionedCache:
+    """Pruebas de la caché LRU de respuestas por versión"""
+
+    def test_entries_are_scoped_to_their_version(self):
+        cache = VersionedCache()
+        cache.put("v1", "/", "uno", 3)
+        assert cache.get("v1", "/") == "uno"
+        assert cache.get("v2", "/") is None
+
+    def test_evicts_least_recently_used_by_count_and_size(self):
+        cache = VersionedCache(max_entries=2, max_bytes=10)
+        cache.put("v", "a", "A", 4)
+        cache.put("v", "b", "B", 4)
+        cache.get("v", "a")
+        cache.put("v", "c", "C", 4)
+        assert cache.get("v", "b") is None
+        assert cache.get("v", "a") == "A"
+
+        cache.put("v", "d", "D", 8)
+        assert cache.stats()["entries"] == 1 and cache.stats()["bytes"] == 8
+        cache.put("v", "e", "E", 11)
+        assert cache.get("v", "e") is None
+
+    def test_streams_are_shared_and_sized_when_finished(self):
+        cache = VersionedCache(max_bytes=1000)
+        first = cache.setdefault("v", "/", "uno", 0)
+        assert cache.setdefault("v", "/", "dos", 0) == first == "uno"
+
+        cache.resize("v", "/", 600)
+        assert cache.stats()["bytes"] == 600
+        cache.resize("v", "/", 2000)
+        assert cache.get("v", "/") is None and cache.stats()["bytes"] == 0
+
+    def test_compressed_stream_readers_share_one_compression(self):
+        produced = []
+
+        def chunks():
+            for i in range(4):
+                produced.append(i)
+                yield f"bloque {i} ".encode() * 100
+
+        sizes = []
+        stream = CompressedStream(chunks(), "gzip", sizes.append)
+        leader, follower = iter(stream), iter(stream)
+        first = next(leader)
+        assert produced == [0]
+        assert next(follower) == first
+
+        # El primer lector se desconecta; el segundo termina la compresión
+        leader.close()
+        body = first + b"".join(follower)
+        assert gzip.decompress(body) == b"".join(
+            f"bloque {i} ".encode() * 100 for i in range(4)
+        )
+        assert produced == [0, 1, 2, 3] and sizes == [len(body)]
+        assert b"".join(stream) == body
+
+
+class TestStreaming:
+    """Pruebas de los recorridos en streaming sin cargar la lista completa"""
+
+    @pytest.mark.parametrize("indent", [None, 2])
+    def test_iter_file_across_chunk_boundaries(self, indent, tasks_file):
+        tasks = [make_task(i, text=f'Ñandú "{i}" 🐦') for i in range(1, 50)]
+        with open(tasks_file, "w", encoding="utf-8") as f:
+            json.dump(tasks, f, ensure_ascii=False, indent=indent)
+
+        for use_mmap in (False, True):
+            streamed = serializers.iter_file(tasks_file, use_mmap, chunk_size=5)
+            assert list(streamed) == tasks
+
+    def test_iter_file_rejects_truncated_snapshot(self, tasks_file):
+        with open(tasks_file, "w", encoding="utf-8") as f:
+            f.write('[{"id": 1, "text": "A"}, {"id": 2, "te')
+
+        with pytest.raises(ValueError):
+            list(serializers.iter_file(tasks_file, chunk_size=8))
+
+    def test_cold_reads_do_not_fill_the_cache(self, store):
+        for text in ("A", "B", "C"):
+            store.add({"text": text, "completed": False, "created_at": "x"})
+        store.toggle(1)
+        store.delete(2)
+        if hasattr(store, "wait_for_compaction"):
+            store.wait_for_compaction()
+
+        cold = type(store)(store.path)
+        assert cold.count() == 2
+        assert [(t["text"], t["completed"]) for t in cold.iter_tasks()] == [
+            ("A", True),
+            ("C", False),
+        ]
+        assert cold.stats()["misses"] == 0
+
+    def test_export_streams_ndjson(self, client):
+        client.post("/api/tasks", json={"text": "A"})
+        client.post("/api/tasks", json={"text": "B"})
+
+        response = client.get("/api/tasks/export")
+
+        assert response.mimetype == "application/x-ndjson"
+        lines = response.get_data(as_text=True).splitlines()
+        assert [json.loads(line)["text"] for line in lines] == ["A", "B"]
+        assert client.get("/api/tasks/count").get_json() == {"count": 2}
+
+
+class TestJournalTaskStore:
+    """Pruebas del almacenamiento con log de cambios"""
+
+    def test_mutations_are_appended_to_the_log(self, tasks_file):
+        write_tasks(tasks_file, [make_task(1), make_task(2)])
+        store = JournalTaskStore(tasks_file)
+        snapshot_before = open(tasks_file, encoding="utf-8").read()
+
+        store.add({"text": "Nueva", "completed": False, "created_at": "x"})
+        store.toggle(1)
+        store.delete(2)
+
+        assert open(tasks_file, encoding="utf-8").read() == snapshot_before
+        with open(store.journal_path, encoding="utf-8") as f:
+            assert [json.loads(line)["op"] for line in f] == ["put", "put", "delete"]
+
+    def test_state_is_snapshot_plus_replay(self, tasks_file):
+        write_tasks(tasks_file, [make_task(1), make_task(2)])
+        store = JournalTaskStore(tasks_file)
+        store.add({"text": "Nueva", "completed": False, "created_at": "x"})
+        store.toggle(1)
+        store.delete(2)
+
+        reopened = JournalTaskStore(tasks_file).all()
+
+        assert [(t["id"], t["completed"]) for t in reopened] == [(1, True), (3, False)]
+
+    def test_compaction_merges_log_into_snapshot(self, tasks_file):
+        store = JournalTaskStore(tasks_file, compact_threshold=5)
+        for i in range(7):
+            store.add({"text": f"T{i}", "completed": False, "created_at": "x"})
+        store.wait_for_compaction()
+
+        assert not os.path.exists(store.compacting_path)
+        with open(tasks_file, encoding="utf-8") as f:
+            assert len(json.load(f)) == 5
+        assert [t["text"] for t in JournalTaskStore(tasks_file).all()] == [
+            f"T{i}" for i in range(7)
+        ]
+
+
+class TestShardedTaskStore:
+    """Pruebas del almacenamiento en segmentos por rango de id"""
+
+    def test_mutation_rewrites_only_its_segment(self, tasks_file):
+        store = ShardedTaskStore(tasks_file, shard_size=10)
+        for i in range(25):
+            store.add({"text": f"T{i}", "completed": False, "created_at": "x"})
+        segments = sorted(
+            name for name in os.listdir(store.directory) if name.endswith(".json")
+        )
+        assert segments == ["manifest.json"] + [
+            f"shard-00000{n}.json" for n in range(3)
+        ]
+        before = {
+            name: os.stat(os.path.join(store.directory, name)).st_ino
+            for name in segments
+        }
+
+        store.toggle(15)
+
+        # Cada reescritura publica un archivo nuevo (otro inodo)
+        changed = [
+            name
+            for name in segments
+            if os.stat(os.path.join(store.directory, name)).st_ino != before[name]
+        ]
+        assert changed == ["shard-000001.json"]
+
+    def test_segments_are_loaded_lazily(self, tasks_file):
+        store = ShardedTaskStore(tasks_file, shard_size=10)
+        for i in range(25):
+            store.add({"text": f"T{i}", "completed": False, "created_at": "x"})
+
+        reopened = ShardedTaskStore(tasks_file)
+        reopened.toggle(22)
+
+        assert reopened.stats()["loaded_shards"] == 1
+        assert reopened.count() == 25
+        assert [t["id"] for t in reopened.all() if t["completed"]] == [22]
+
+    def test_totals_and_validators_do_not_load_segments(self, tasks_file):
+        store = ShardedTaskStore(tasks_file, shard_size=10)
+        store.add_many(
+            [
+                {"text": f"T{i}", "completed": i < 5, "created_at": "x"}
+                for i in range(25)
+            ]
+        )
+
+        reopened = ShardedTaskStore(tasks_file)
+        etag, version = reopened.etag(), reopened.version()
+        assert reopened.counts() == {"total": 25, "completed": 5}
+        assert reopened.stats()["loaded_shards"] == 0
+        assert (reopened.etag(), reopened.version()) == (etag, version)
+
+        store.toggle(22)
+        assert reopened.counts() == {"total": 25, "completed": 6}
+        assert reopened.etag() != etag and reopened.version() > version
+        assert reopened.stats()["loaded_shards"] == 0
+
+    def test_segment_totals_survive_a_restart(self, tasks_file, monkeypatch):
+        store = ShardedTaskStore(tasks_file, shard_size=10)
+        store.add_many(
+            [
+                {"text": f"T{i}", "completed": False, "created_at": "x"}
+                for i in range(25)
+            ]
+        )
+        store.counts()
+        store.toggle(3)
+
+        # Solo se vuelve a leer el segmento que cambió desde counts.cache
+        read = []
+        monkeypatch.setattr(
+            "task_store._read_tasks", lambda path: read.append(path) or []
+        )
+        reopened = ShardedTaskStore(tasks_file)
+        assert reopened.counts()["total"] == 15
+        assert read == [reopened._segment_path(0)]
+
+    def test_imports_existing_single_file(self, tasks_file):
+        write_tasks(tasks_file, [make_task(i) for i in range(1, 8)])
+        store = ShardedTaskStore(tasks_file, shard_size=3)
+
+        assert store.stats()["shards"] == 3
+        assert [t["id"] for t in store.all()] == list(range(1, 8))
+        assert (
+            store.add({"text": "N", "completed": False, "created_at": "x"})["id"] == 8
+        )
+
+    @pytest.mark.skipif(os.name == "nt", reason="Requiere fork y fcntl")
+    def test_concurrent_workers_create_segments(self, tasks_file, monkeypatch):
+        monkeypatch.setenv("TASK_SHARD_SIZE", "10")
+        context = multiprocessing.get_context("fork")
+        workers = [
+            context.Process(
+                target=_add_from_worker, args=("sharded", tasks_file, worker, 25)
+            )
+            for worker in range(8)
+        ]
+        for process in workers:
+            process.start()
+        for process in workers:
+            process.join(60)
+            assert process.exitcode == 0
+
+        store = create_store(tasks_file, "sharded")
+        tasks = store.all()
+        assert len({t["id"] for t in tasks}) == len(tasks) == 200
+        assert all(t["completed"] for t in tasks)
+        assert store.stats()["shards"] >= 20
+
+
+class TestSQLiteTaskStore:
+    """Pruebas del backend SQLite"""
+
+    def test_uses_wal_and_indexes(self, tmp_path):
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"))
+        with store._connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            indexes = {row[1] for row in conn.execute("PRAGMA index_list(tasks)")}
+        assert {"idx_tasks_completed", "idx_tasks_created_at"} <= indexes
+
+    def test_imports_existing_json_file(self, tasks_file, tmp_path):
+        write_tasks(tasks_file, [make_task(1), make_task(2, completed=True)])
+        store = SQLiteTaskStore(str(tmp_path / "tasks.db"), import_from=tasks_file)
+
+        assert [t["completed"] for t in store.all()] == [False, True]
+
+    def test_sees_writes_from_another_connection(self, tmp_path):
+        path = str(tmp_path / "tasks.db")
+        store = SQLiteTaskStore(path)
+        other = SQLiteTaskStore(path)
+        store.add({"text": "A", "completed": False, "created_at": "x"})
+        assert len(other.all()) == 1
+
+        other.toggle(1)
+
+        assert store.all()[0]["completed"] is True
+
+
+class TestTaskRoutes:
+    """Pruebas de las rutas usando el cliente de pruebas de Flask"""
+
+    def test_api_add_and_list(self, client):
+        response = client.post("/api/tasks", json={"text": "API"})
+        assert response.status_code == 201
+
+        tasks = client.get("/api/tasks").get_json()
+        assert [t["text"] for t in tasks] == ["API"]
+
+    def test_api_keyset_pagination(self, client):
+        for i in range(7):
+            client.post("/api/tasks", json={"text": f"T{i}"})
+
+        seen, cursor = [], None
+        while True:
+            query = {"limit": 3} if cursor is None else {"limit": 3, "after_id": cursor}
+            page = client.get("/api/tasks", query_string=query).get_json()
+            seen.extend(t["text"] for t in page["tasks"])
+            cursor = page["next_cursor"]
+            if cursor is None:
+                break
+
+        assert seen == [f"T{i}" for i in range(7)]
+        assert client.get("/api/tasks?limit=0").status_code == 400
+        assert client.get("/api/tasks?after_id=x").status_code == 400
+        assert client.get("/api/tasks?after_id=1&before_id=5").status_code == 400
+
+    def test_descending_pages_have_no_prev_cursor(self, client):
+        client.post("/api/tasks/batch", json=[f"T{i}" for i in range(5)])
+
+        page = client.get("/api/tasks?order=desc&limit=2&after_id=4").get_json()
+        assert [t["id"] for t in page["tasks"]] == [3, 2]
+        assert page["next_cursor"] == 2 and page["prev_cursor"] is None
+        ascending = client.get("/api/tasks?limit=2&after_id=2").get_json()
+        assert ascending["prev_cursor"] == 3
+        previous = client.get("/api/tasks?limit=2&before_id=3").get_json()
+        assert [t["id"] for t in previous["tasks"]] == [1, 2]
+
+    def test_api_change_feed(self, client):
+        start = client.get("/api/tasks/changes").get_json()
+        assert start["resync"] is True
+
+        client.post("/api/tasks", json={"text": "A"})
+        feed = client.get(f"/api/tasks/changes?since={start['version']}").get_json()
+        if not isinstance(app_module.store, ShardedTaskStore):
+            assert feed["resync"] is False
+            assert [c["task"]["text"] for c in feed["changes"]] == ["A"]
+
+        stale = client.get("/api/tasks/changes?since=otro-1").get_json()
+        assert stale["resync"] is True
+        assert client.get("/api/tasks/changes?since=1").status_code == 400
+
+    def test_change_feed_needs_shared_versions_with_several_workers(
+        self, client, store, monkeypatch
+    ):
+        monkeypatch.setattr(app_module, "WORKERS", 4)
+        changes = client.get("/api/tasks/changes")
+        events = client.get("/api/tasks/events", buffered=False)
+        if store.shared_changes:
+            assert changes.status_code == 200 and events.status_code == 200
+        else:
+            assert changes.status_code == 501 and events.status_code == 501
+            assert "4 workers" in changes.get_json()["error"]
+        events.close()
+
+    def test_event_stream_pushes_mutations(self, client, store, monkeypatch):
+        if isinstance(store, ShardedTaskStore):
+            pytest.skip("ShardedTaskStore siempre pide resincronizar")
+        monkeypatch.setattr(app_module, "SSE_POLL_SECONDS", 0.01)
+        response = client.get("/api/tasks/events", buffered=False)
+        assert response.mimetype == "text/event-stream"
+        events = response.iter_encoded()
+
+        assert next(events).startswith(b"retry:")
+        assert b"event: resync" in next(events)
+        store.add({"text": "Push", "completed": False, "created_at": "x"})
+        pushed = next(events).decode()
+        response.close()
+
+        fields = dict(line.split(": ", 1) for line in pushed.strip().splitlines())
+        assert fields["event"] == "changes"
+        assert json.loads(fields["data"])["changes"][0]["task"]["text"] == "Push"
+        assert fields["id"] == json.loads(fields["data"])["version"]
+
+    def test_event_stream_resumes_from_last_event_id(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "SSE_MAX_STREAM_SECONDS", 0.1)
+        monkeypatch.setattr(app_module, "SSE_POLL_SECONDS", 0.01)
+        token = client.get("/api/tasks/changes").get_json()["version"]
+        client.post("/api/tasks", json={"text": "Perdida"})
+
+        body = client.get(
+            "/api/tasks/events", headers={"Last-Event-ID": token}
+        ).get_data(as_text=True)
+        if not isinstance(app_module.store, ShardedTaskStore):
+            assert "event: resync" not in body
+            assert "event: changes" in body and "Perdida" in body
+
+        bad_id = client.get("/api/tasks/events", headers={"Last-Event-ID": "x"})
+        assert bad_id.status_code == 400
+
+    def test_event_subscribers_are_limited(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "event_subscribers", threading.Semaphore(1))
+        first = client.get("/api/tasks/events", buffered=False)
+        assert client.get("/api/tasks/events").status_code == 503
+
+        first.close()
+        second = client.get("/api/tasks/events", buffered=False)
+        assert second.status_code == 200
+        second.close()
+
+    def test_api_filters_and_sort(self, client):
+        for text in ("A", "B", "C"):
+            client.post("/api/tasks", json={"text": text})
+        client.get("/toggle/2")
+
+        done = client.get("/api/tasks?completed=true").get_json()
+        assert [t["text"] for t in done["tasks"]] == ["B"]
+        newest = client.get("/api/tasks?sort=created_at&order=desc&limit=2").get_json()
+        assert [t["text"] for t in newest["tasks"]] == ["C", "B"]
+        last = newest["tasks"][-1]
+        assert newest["next_cursor"] == f"{last['created_at']},{last['id']}"
+        assert client.get("/api/tasks?completed=maybe").status_code == 400
+        assert client.get("/api/tasks?created_after=ayer").status_code == 400
+        assert client.get("/api/tasks?sort=created_at&after_id=1").status_code == 400
+
+    def test_created_at_cursor_does_not_skip_same_timestamp(self, client):
+        # Las tareas de un lote comparten created_at
+        client.post("/api/tasks/batch", json=[f"T{i}" for i in range(5)])
+
+        for order in ("asc", "desc"):
+            texts, cursor = [], None
+            while True:
+                query = f"/api/tasks?sort=created_at&order={order}&limit=2"
+                if cursor is not None:
+                    query += f"&after={cursor}"
+                page = client.get(query).get_json()
+                texts += [t["text"] for t in page["tasks"]]
+                cursor = page["next_cursor"]
+                if cursor is None:
+                    break
+            expected = [f"T{i}" for i in range(5)]
+            assert texts == (expected if order == "asc" else expected[::-1])
+
+        assert client.get("/api/tasks?sort=created_at&after=x").status_code == 400
+        assert client.get("/api/tasks?after=2025-01-01,1").status_code == 400
+
+    def test_created_bounds_accept_any_iso_format(self, client, store):
+        store.replace(
+            [
+                dict(make_task(1), created_at="2025-06-11T09:00:00"),
+                dict(make_task(2), created_at="2025-06-11T17:00:00"),
+            ]
+        )
+        for bound in ("2025-06-11 16:00:00", "2025-06-11T16:00"):
+            page = client.get(f"/api/tasks?created_after={bound}").get_json()
+            assert [t["id"] for t in page["tasks"]] == [2]
+        # fromisoformat() acepta el formato compacto desde Python 3.11, pero
+        # no antes: se rechaza siempre
+        response = client.get("/api/tasks?created_after=20250611T160000")
+        assert response.status_code == 400
+
+    def test_created_bounds_with_timezone_use_local_time(
+        self, client, store, monkeypatch
+    ):
+        monkeypatch.setenv("TZ", "America/Bogota")
+        time.tzset()
+        try:
+            store.replace(
+                [
+                    dict(make_task(1), created_at="2025-06-11T09:00:00"),
+                    dict(make_task(2), created_at="2025-06-11T17:00:00"),
+                ]
+            )
+            # 21:00Z y 16:00-05:00 son las 16:00 en Bogotá
+            for bound in ("2025-06-11T21:00:00Z", "2025-06-11T16:00:00-05:00"):
+                page = client.get(
+                    "/api/tasks", query_string={"created_after": bound}
+                ).get_json()
+                assert [t["id"] for t in page["tasks"]] == [2]
+        finally:
+            monkeypatch.undo()
+            time.tzset()
+
+    def test_batch_create_json_and_ndjson(self, client):
+        response = client.post("/api/tasks/batch", json=["A", {"text": " B "}])
+        assert response.status_code == 201
+        assert [t["text"] for t in response.get_json()] == ["A", "B"]
+
+        response = client.post(
+            "/api/tasks/batch",
+            data='"C"\n{"text": "D"}\n',
+            content_type="application/x-ndjson",
+        )
+        assert [t["id"] for t in response.get_json()] == [3, 4]
+        assert client.get("/api/tasks/count").get_json() == {"count": 4}
+
+        assert client.post("/api/tasks/batch", json=[]).status_code == 400
+        assert client.post("/api/tasks/batch", json=["ok", ""]).status_code == 400
+        assert client.post("/api/tasks/batch", json={"text": "A"}).status_code == 400
+
+    def test_bulk_mutations_report_each_id(self, client):
+        client.post("/api/tasks/batch", json=["A", "B", "C"])
+
+        response = client.post(
+            "/api/tasks/bulk", json={"op": "complete", "ids": [1, 3, 99]}
+        )
+        assert [r["status"] for r in response.get_json()["results"]] == [
+            "updated",
+            "updated",
+            "not_found",
+        ]
+        done = client.get("/api/tasks?completed=true").get_json()["tasks"]
+        assert [t["id"] for t in done] == [1, 3]
+
+        response = client.post(
+            "/api/tasks/bulk", json={"op": "delete", "ids": [1, 2, 3]}
+        )
+        assert {r["status"] for r in response.get_json()["results"]} == {"deleted"}
+        assert client.get("/api/tasks").get_json() == []
+
+        assert (
+            client.post(
+                "/api/tasks/bulk", json={"op": "archive", "ids": [1]}
+            ).status_code
+            == 400
+        )
+        assert (
+            client.post(
+                "/api/tasks/bulk", json={"op": "delete", "ids": "1"}
+            ).status_code
+            == 400
+        )
+
+    def test_conditional_get_returns_304_without_loading(
+        self, client, store, monkeypatch
+    ):
+        client.post("/api/tasks", json={"text": "A"})
+        etag = store.etag()
+        fresh = type(store)(store.path)
+        monkeypatch.setattr(app_module, "store", fresh)
+
+        page_etag = f"{etag}-{app_module.page_build_id()}"
+        for path, expected in (
+            ("/", page_etag),
+            ("/api/tasks", etag),
+            ("/api/tasks?limit=5", etag),
+        ):
+            response = client.get(path, headers={"If-None-Match": f'"{expected}"'})
+            assert response.status_code == 304 and response.data == b""
+            assert response.headers["ETag"] == f'"{expected}"'
+        assert fresh.stats()["misses"] == 0
+
+        client.post("/api/tasks", json={"text": "B"})
+        response = client.get("/api/tasks", headers={"If-None-Match": f'"{etag}"'})
+        assert response.status_code == 200
+        assert response.headers["ETag"] != f'"{etag}"'
+
+    def test_stats_follow_mutations_without_listing(self, client, monkeypatch):
+        client.post("/api/tasks/batch", json=["A", "B", "C"])
+        client.patch("/api/tasks/2", json={"completed": True})
+        client.delete("/api/tasks/3")
+        monkeypatch.setattr(
+            app_module.store, "all", lambda: pytest.fail("stats listed all tasks")
+        )
+
+        response = client.get("/api/tasks/stats")
+        assert response.get_json() == {"total": 2, "completed": 1, "pending": 1}
+        etag = response.headers["ETag"]
+        assert (
+            client.get("/api/tasks/stats", headers={"If-None-Match": etag}).status_code
+            == 304
+        )
+
+    def test_full_list_is_streamed_as_json_or_ndjson(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "STREAM_CHUNK_SIZE", 2)
+        client.post("/api/tasks/batch", json=[f"T{i}" for i in range(5)])
+
+        response = client.get("/api/tasks")
+        assert response.is_streamed and response.mimetype == "application/json"
+        assert [t["text"] for t in response.get_json()] == [f"T{i}" for i in range(5)]
+
+        ndjson = client.get("/api/tasks", headers={"Accept": "application/x-ndjson"})
+        assert ndjson.mimetype == "application/x-ndjson"
+        lines = ndjson.get_data(as_text=True).splitlines()
+        assert [json.loads(line) for line in lines] == response.get_json()
+        assert ndjson.headers["ETag"] != response.headers["ETag"]
+        assert "Accept" in ndjson.headers["Vary"]
+
+    def test_concurrent_downloads_use_bounded_memory(self, tasks_file, monkeypatch):
+        store = JSONTaskStore(tasks_file)
+        store.add_many(
+            [
+                {
+                    "text": f"Tarea {i} " + "x" * 80,
+                    "completed": False,
+                    "created_at": "x",
+                }
+                for i in range(5000)
+            ]
+        )
+        monkeypatch.setattr(app_module, "store", store)
+        body_size = len(app_module.app.test_client().get("/api/tasks").data)
+
+        # Las 50 descargas quedan abiertas a la vez después del primer bloque
+        downloads = 50
+        started = threading.Barrier(downloads)
+        sizes = []
+
+        def download():
+            response = app_module.app.test_client().get("/api/tasks", buffered=False)
+            chunks = response.iter_encoded()
+            size = len(next(chunks))
+            started.wait()
+            size += sum(len(chunk) for chunk in chunks)
+            response.close()
+            sizes.append(size)
+
+        tracemalloc.start()
+        try:
+            threads = [threading.Thread(target=download) for _ in range(downloads)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert sizes == [body_size] * downloads
+        # Con el cuerpo completo en memoria serían al menos 50 * body_size
+        assert peak < downloads * body_size / 4
+
+    def test_responses_are_compressed_once_per_version(self, client, monkeypatch):
+        cache = VersionedCache()
+        monkeypatch.setattr(app_module, "compressed_responses", cache)
+        client.post("/api/tasks/batch", json=[f"Tarea {i}" for i in range(50)])
+        gzip_headers = {"Accept-Encoding": "gzip"}
+
+        plain = client.get("/api/tasks")
+        first = client.get("/api/tasks", headers=gzip_headers)
+        assert first.headers["Content-Encoding"] == "gzip"
+        assert gzip.decompress(first.data) == plain.data
+        assert "Accept-Encoding" in first.headers["Vary"]
+        assert first.headers["ETag"] != plain.headers["ETag"]
+
+        second = client.get("/api/tasks", headers=gzip_headers)
+        assert second.data == first.data
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        client.post("/api/tasks", json={"text": "Nueva"})
+        third = client.get("/api/tasks", headers=gzip_headers)
+        assert b"Nueva" in gzip.decompress(third.data)
+        assert cache.misses == 2
+
+        page = client.get("/", headers=gzip_headers)
+        assert b"Total: 51 tareas" in gzip.decompress(page.data)
+
+    def test_compressed_full_list_stays_streamed(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "STREAM_CHUNK_SIZE", 2)
+        cache = VersionedCache()
+        monkeypatch.setattr(app_module, "compressed_responses", cache)
+        client.post("/api/tasks/batch", json=[f"Tarea {i}" for i in range(9)])
+        plain = client.get("/api/tasks").data
+        gzip_headers = {"Accept-Encoding": "gzip"}
+
+        first = client.get("/api/tasks", headers=gzip_headers, buffered=False)
+        assert first.is_streamed and first.headers["Content-Encoding"] == "gzip"
+        assert "Content-Length" not in first.headers
+        chunks = first.iter_encoded()
+        head = next(chunks)
+
+        # Una petición simultánea reutiliza la misma compresión
+        second = client.get("/api/tasks", headers=gzip_headers)
+        assert (cache.hits, cache.misses) == (1, 1)
+        body = head + b"".join(chunks)
+        first.close()
+        assert second.data == body and gzip.decompress(body) == plain
+        assert cache.stats()["bytes"] == len(body)
+
+    def test_form_toggle_and_delete(self, client):
+        client.post("/add", data={"task": "Formulario"})
+        task_id = client.get("/api/tasks").get_json()[0]["id"]
+
+        assert client.get(f"/toggle/{task_id}").status_code == 302
+        assert client.get("/api/tasks").get_json()[0]["completed"] is True
+
+        assert client.get(f"/delete/{task_id}").status_code == 302
+        assert client.get("/api/tasks").get_json() == []
+
+    def test_api_patch_and_delete_task(self, client):
+        task_id = client.post("/api/tasks", json={"text": "REST"}).get_json()["id"]
+
+        patched = client.patch(f"/api/tasks/{task_id}", json={"completed": True})
+        assert patched.status_code == 200
+        assert patched.get_json()["completed"] is True
+        assert (
+            client.patch(f"/api/tasks/{task_id}", json={"completed": "yes"}).status_code
+            == 400
+        )
+        assert (
+            client.patch(
+                f"/api/tasks/{task_id}", json={"completed": True, "text": "x"}
+            ).status_code
+            == 400
+        )
+        assert (
+            client.patch("/api/tasks/999", json={"completed": True}).status_code == 404
+        )
+
+        deleted = client.delete(f"/api/tasks/{task_id}")
+        assert deleted.status_code == 204 and deleted.data == b""
+        assert client.delete(f"/api/tasks/{task_id}").status_code == 404
+        assert client.get("/api/tasks").get_json() == []
+
+    def test_form_routes_answer_json_without_redirect(self, client):
+        headers = {"Accept": "application/json"}
+        added = client.post("/add", data={"task": "Formulario"}, headers=headers)
+        assert added.status_code == 201
+        task_id = added.get_json()["id"]
+        assert (
+            client.post("/add", data={"task": " "}, headers=headers).status_code == 400
+        )
+
+        toggled = client.get(f"/toggle/{task_id}", headers=headers)
+        assert toggled.status_code == 200 and toggled.get_json()["completed"] is True
+        assert client.get(f"/delete/{task_id}", headers=headers).status_code == 204
+        assert client.get(f"/toggle/{task_id}", headers=headers).status_code == 404
+
+        browser = "text/html,application/xhtml+xml,*/*;q=0.8"
+        assert (
+            client.post(
+                "/add", data={"task": "B"}, headers={"Accept": browser}
+            ).status_code
+            == 302
+        )
+
+    def test_index_is_rendered_once_per_version(self, client, monkeypatch):
+        cache = VersionedCache()
+        monkeypatch.setattr(app_module, "rendered_pages", cache)
+        renders = []
+        render_template = app_module.render_template
+
+        def counting_render(*args, **kwargs):
+            renders.append(args[0])
+            return render_template(*args, **kwargs)
+
+        monkeypatch.setattr(app_module, "render_template", counting_render)
+        task_id = client.post("/api/tasks", json={"text": "A"}).get_json()["id"]
+
+        assert client.get("/").data == client.get("/").data
+        assert len(renders) == 1 and cache.hits == 1
+
+        mutations = [
+            lambda: client.post("/add", data={"task": "B"}),
+            lambda: client.get(f"/toggle/{task_id}"),
+            lambda: client.patch(f"/api/tasks/{task_id}", json={"completed": False}),
+            lambda: client.post("/api/tasks/batch", json=["C"]),
+            lambda: client.post("/api/tasks/bulk", json={"op": "toggle", "ids": [1]}),
+            lambda: client.delete(f"/api/tasks/{task_id}"),
+        ]
+        for mutate in mutations:
+            client.get("/")
+            mutate()
+            assert cache.stats()["entries"] == 0
+        assert b"C" in client.get("/").data
+        assert len(renders) == len(mutations) + 1
+
+    def test_homepage_renders_a_window_with_totals(self, client, monkeypatch):
+        monkeypatch.setattr(app_module, "HOMEPAGE_PAGE_SIZE", 2)
+        client.post("/api/tasks/batch", json=[f"T{i}" for i in range(5)])
+        client.post("/api/tasks/bulk", json={"op": "complete", "ids": [1, 4]})
+
+        def page(query=""):
+            html = client.get(f"/{query}").get_data(as_text=True)
+            texts = re.findall(r'data-testid="task-text">\s*(\S+)', html)
+            after = re.search(r"after_id=(\d+)", html)
+            before = re.search(r"before_id=(\d+)", html)
+            assert "Total: 5 tareas" in html and "Completadas: 2" in html
+            return texts, after and after.group(1), before and before.group(1)
+
+        assert page() == (["T0", "T1"], "2", None)
+        assert page("?after_id=2") == (["T2", "T3"], "4", "3")
+        assert page("?after_id=4") == (["T4"], None, "5")
+        assert page("?before_id=3") == (["T0", "T1"], "2", None)
+
+    def test_homepage_links_fingerprinted_assets(self, client):
+        html = client.get("/").get_data(as_text=True)
+        assert "<style>" not in html and "onclick" not in html
+        urls = re.findall(r'(?:href|src)="(/assets/[0-9a-f]{12}/[^"]+)"', html)
+        assert sorted(url.rsplit("/", 1)[-1] for url in urls) == ["app.js", "style.css"]
+
+        for url in urls:
+            asset = client.get(url)
+            assert asset.status_code == 200
+            assert "immutable" in asset.headers["Cache-Control"]
+
+        stale = client.get("/assets/000000000000/css/style.css")
+        assert stale.status_code == 302
+        assert stale.headers["Location"].endswith(
+            next(url for url in urls if url.endswith(".css"))
+        )
+        assert client.get("/assets/0/css/missing.css").status_code == 404
+        assert client.get("/assets/0/../app.py").status_code == 404
+
+    def test_warm_up_fills_template_and_bytecode_caches(self, tmp_path, monkeypatch):
+        env = app_module.app.jinja_env
+        monkeypatch.setattr(
+            env, "bytecode_cache", FileSystemBytecodeCache(str(tmp_path))
+        )
+        env.cache.clear()
+
+        assert app_module.warm_up() >= 1
+        assert "index.html" in [name for _, name in env.cache.keys()]
+        assert list(tmp_path.iterdir())
+
+        # Otro proceso con el mismo directorio carga el bytecode sin compilar
+        env.cache.clear()
+        monkeypatch.setattr(
+            env, "compile", lambda *a, **k: pytest.fail("template was recompiled")
+        )
+        env.get_template("index.html")
+
+    def test_homepage_etag_changes_with_a_deploy(self, client, tmp_path, monkeypatch):
+        static = tmp_path / "static"
+        shutil.copytree(app_module.app.static_folder, static)
+        monkeypatch.setattr(app_module, "assets", AssetFingerprints(str(static)))
+        etag = client.get("/").headers["ETag"]
+        assert client.get("/", headers={"If-None-Match": etag}).status_code == 304
+
+        # Nueva hoja de estilos sin cambios en las tareas
+        (static / "css" / "style.css").write_text("body { color: red; }")
+        response = client.get("/", headers={"If-None-Match": etag})
+        assert response.status_code == 200 and response.headers["ETag"] != etag
+        css = app_module.assets.fingerprint("css/style.css")
+        assert f"/assets/{css}/css/style.css" in response.get_data(as_text=True)
+
+    def test_cache_stats_endpoint(self, client):
+        client.get("/api/tasks")
+        stats = client.get("/api/cache/stats").get_json()
+        assert {"hits", "misses", "hit_rate"} <= set(stats)
+        assert {"hits", "misses", "hit_rate"} <= set(stats["rendered_pages"])
+
+
+def _free_port():
+    """Puerto TCP libre en localhost"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _request(url, data=None):
+    """(estado, cuerpo JSON) de una petición al servidor de prueba"""
+    body = None if data is None else json.dumps(data).encode("utf-8")
+    request = urllib.request.Request(
+        url, data=body, headers={"Content-Type": "application/json"}
+    )
+    with urllib.request.urlopen(request, timeout=5) as response:
+        return response.status, json.loads(response.read())
+
+
+class TestServers:
+    """Pruebas de humo de python app.py con gevent y con gunicorn"""
+
+    @pytest.mark.skipif(os.name == "nt", reason="gunicorn requiere fork")
+    @pytest.mark.parametrize(
+        "environ",
+        [{"GEVENT": "1"}, {"WORKERS": "2"}, {"GEVENT": "1", "WORKERS": "2"}],
+        ids=["gevent", "gunicorn", "gunicorn-gevent"],
+    )
+    def test_app_serves_requests(self, environ, tmp_path):
+        needed = ["gevent"] * ("GEVENT" in environ) + ["gunicorn"] * (
+            "WORKERS" in environ
+        )
+        missing = [name for name in needed if importlib.util.find_spec(name) is None]
+        if missing:
+            pytest.skip(f"{', '.join(missing)} no está instalado")
+
+        port = _free_port()
+        env = dict(
+            os.environ, **environ, HOST="127.0.0.1", PORT=str(port), TASK_STORE="json"
+        )
+        app_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), "app.py")
+        log = open(tmp_path / "server.log", "w+", encoding="utf-8")
+        # Cada servidor usa su propio tasks.json en tmp_path
+        server = subprocess.Popen(
+            [sys.executable, app_path],
+            cwd=tmp_path,
+            env=env,
+            stdout=log,
+            stderr=subprocess.STDOUT,
+        )
+        base = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + 20
+            while True:
+                try:
+                    assert _request(f"{base}/health")[0] == 200
+                    break
+                except OSError:
+                    if server.poll() is not None or time.monotonic() > deadline:
+                        log.seek(0)
+                        pytest.fail(f"el servidor no arrancó:\n{log.read()}")
+                    time.sleep(0.1)
+
+            for text in ("A", "B", "C"):
+                assert _request(f"{base}/api/tasks", {"text": text})[0] == 201
+            # Con varios workers cada petición puede caer en otro proceso
+            for _ in range(4):
+                assert _request(f"{base}/api/tasks/count")[1] == {"count": 3}
+
+            if "WORKERS" in environ:
+                # tasks.json da un feed por proceso: no se ofrece (501)
+                with pytest.raises(urllib.error.HTTPError) as error:
+                    urllib.request.urlopen(f"{base}/api/tasks/events", timeout=5)
+                assert error.value.code == 501
+            else:
+                with urllib.request.urlopen(
+                    f"{base}/api/tasks/events", timeout=5
+                ) as events:
+                    assert events.readline().startswith(b"retry:")
+        finally:
+            server.terminate()
+            server.wait(10)
+            log.close()